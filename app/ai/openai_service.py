@@ -1,9 +1,21 @@
 import os
-from openai import AsyncOpenAI
+import time
+from utils.baselines import format_baseline_group, format_percentiles
+from monitoring.metrics import OPENAI_REQUEST_SECONDS, OPENAI_TOKENS, OPENAI_ERRORS
+from monitoring.tracing import span
+
+OPENAI_MODEL = "gpt-4"
 
-# Initialize OpenAI client
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+_openai_client = None
+
+def get_openai_client():
+    """Create the OpenAI client on first use; importing openai is the slowest part of startup"""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
 
 async def generar_mensaje_openai(nombre, stats, participant=None, game_mode="Desconocido"):
     """Generate sarcastic LoL coach message using OpenAI."""
@@ -32,6 +44,18 @@ async def generar_mensaje_openai(nombre, stats, participant=None, game_mode="Des
     else:
         vision_analysis = "En este modo de juego, la visión y el farmeo son menos relevantes."
 
+    # Compare against players of the same role, queue and game length when there is data
+    baseline = stats.get('baseline')
+    if baseline:
+        percentiles = baseline['percentiles']
+        percentile_analysis = f"Percentiles frente a jugadores de {format_baseline_group(baseline['group'])}: {format_percentiles(baseline)}"
+        gold_analysis = f"(percentil `p{percentiles['gold_per_min']}` de oro/min) si está por debajo de p25 dile \"pelabolas\"."
+        level_analysis = f"(percentil `p{percentiles['champ_level']}`) si está por debajo de p25 dile \"Traiganle una falda a la niña\""
+    else:
+        percentile_analysis = "Sin percentiles de referencia para este rol y cola."
+        gold_analysis = 'si es bajo dile "pelabolas", lo normal es más de 10k.'
+        level_analysis = 'si es bajo dile, menor que 14, "Traiganle una falda a la niña"'
+
     multikill_analysis = ""
     if participant.get('pentaKills', 'N/A'):
         multikill_analysis = f" | Pentakills: `{participant.get('pentaKills', 0)}` (¡Bien hecho!)"
@@ -66,8 +90,9 @@ async def generar_mensaje_openai(nombre, stats, participant=None, game_mode="Des
     Ten en cuenta estos otros detalles del jugador:
     - Campeón: `{participant.get('championName', 'N/A')}` (si está disponible)
     - Visión: `{vision_analysis}` 
-    - Oro: `{stats.get('goldEarned', 'N/A')}` si es bajo dile "pelabolas", lo normal es más de 10k.
-    - Nivel: `{stats.get('champLevel', 'N/A')}` si es bajo dile, menor que 14, "Traiganle una falda a la niña"
+    - Oro: `{stats.get('goldEarned', 'N/A')}` {gold_analysis}
+    - Nivel: `{stats.get('champLevel', 'N/A')}` {level_analysis}
+    - {percentile_analysis}
     - {multikill_analysis}
 
     Escribe un mensaje breve (máximo 2 oraciones ni mas ni menos), mencionando específicamente sus estadísticas. tambien le pudes decir casual.
@@ -77,19 +102,30 @@ async def generar_mensaje_openai(nombre, stats, participant=None, game_mode="Des
     Si puedes utiliza manera de hablar latinoamerica, coloquialismos que oscilen entre los diferentes paises de la region ( recuerda máximo 2 oraciones).
     """
 
-    response = await openai_client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {
-                "role": "system",
-                "content": "Eres un jugador de LoL con humor ácido, opiniones fuertes y objetividad si el desempeño fue decente."
-            },
-            {
-                "role": "user",
-                "content": prompt + "\n\nSi el jugador realizó una buena actuación, evalúa objetivamente su desempeño. Y el campeon/rol jugado."
-            }
-        ],
-        #temperature=0.8
-    )
+    started = time.perf_counter()
+    try:
+        with span("openai"):
+            response = await get_openai_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Eres un jugador de LoL con humor ácido, opiniones fuertes y objetividad si el desempeño fue decente."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt + "\n\nSi el jugador realizó una buena actuación, evalúa objetivamente su desempeño. Y el campeon/rol jugado."
+                    }
+                ],
+                #temperature=0.8
+            )
+    except Exception:
+        OPENAI_ERRORS.inc(model=OPENAI_MODEL)
+        raise
+    finally:
+        OPENAI_REQUEST_SECONDS.observe(time.perf_counter() - started, model=OPENAI_MODEL)
+    if response.usage:
+        OPENAI_TOKENS.inc(response.usage.prompt_tokens, model=OPENAI_MODEL, kind="prompt")
+        OPENAI_TOKENS.inc(response.usage.completion_tokens, model=OPENAI_MODEL, kind="completion")
 
     return response.choices[0].message.content.strip()
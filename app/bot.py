@@ -1,42 +1,187 @@
 import discord
 from discord import app_commands
 import os
-from commands import register_commands
+import sys
+import time
+import argparse
+import contextlib
+import shutil
+import subprocess
+import tempfile
+from commands import register_commands, register_persistent_views, sync_command_tree
 from riot.active_game_notify import notify_active_games_task
+from riot.warmup import warm_caches
+from database import init_database_async, load_summoner_index_async, load_baselines_async, search_flush_task, baseline_refresh_task, flush_pending_searches_async, shutdown_db_executor
+from database import db
+from database.db import close_pool
+from utils.log import get_logger, setup_logging
+from monitoring import loop_monitor
+from monitoring.server import start_http_server
+from monitoring.metrics import COMMAND_SECONDS
 import asyncio
+import signal
 
 # Constants
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 
-# Discord setup
-intents = discord.Intents.default()
-intents.guilds = True
-intents.messages = True
-intents.message_content = True  # Necesario para enviar mensajes
-client = discord.Client(intents=intents)
-tree = app_commands.CommandTree(client)
-
-@client.event
-async def on_ready():
-    register_commands(tree)
-    await tree.sync()
-    print(f"✅ Bot conectado como {client.user}")
-
-    cmds = await tree.fetch_commands()
-    print("🔍 Comandos registrados:")
-    for cmd in cmds:
-        print(f"- {cmd.name}")
-    print("\n🌐 Comandos sincronizados correctamente.")
-
-    # Inicia la tarea de notificación de amigos en partida (ajusta el channel_id)
-    channel_id = os.getenv("NOTIFY_CHANNEL_ID")
-    user_id = os.getenv("NOTIFY_USER_ID")
-    if channel_id:
-        asyncio.create_task(notify_active_games_task(bot=client, channel_id=int(channel_id)))
-    if user_id:
-        asyncio.create_task(notify_active_games_task(bot=client, user_id=int(user_id)))
-
-    if not channel_id and not user_id:
-        print("⚠️ No se ha configurado NOTIFY_CHANNEL_ID o NOTIFY_USER_ID. Asegúrate de definir al menos uno en tu archivo .env.")
-
-client.run(DISCORD_TOKEN)
+log = get_logger("bot")
+
+class CapitanCoditos(discord.Client):
+    def __init__(self):
+        # Discord setup
+        intents = discord.Intents.default()
+        intents.guilds = True
+        intents.messages = True
+        intents.message_content = True  # Necesario para enviar mensajes
+        super().__init__(intents=intents)
+        self.tree = app_commands.CommandTree(self)
+        self.http_runner = None
+        self.search_flush = None
+        self.baseline_refresh = None
+
+    async def setup_hook(self):
+        # Loop lag and /metrics are up before anything slow runs, so startup is observable too
+        loop_monitor.start()
+        self.http_runner = await start_http_server(self)
+
+        # Nothing touches the database at import time; connect and migrate here
+        await init_database_async()
+        # Load the autocomplete index before the gateway connects
+        await load_summoner_index_async()
+        await load_baselines_async()
+        register_persistent_views(self)
+
+        # Commands are registered once per process; Discord is only told when they change
+        register_commands(self.tree)
+        await sync_command_tree(self.tree, self.application_id)
+        self.search_flush = asyncio.create_task(search_flush_task())
+        self.baseline_refresh = asyncio.create_task(baseline_refresh_task())
+
+        # Docker stops containers with SIGTERM; close cleanly so buffered searches are flushed
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(self.close()))
+        except NotImplementedError:
+            pass
+
+    async def on_ready(self):
+        log.info("Bot connected", user=self.user)
+
+        # Inicia la tarea de notificación de amigos en partida (ajusta el channel_id)
+        channel_id = os.getenv("NOTIFY_CHANNEL_ID")
+        user_id = os.getenv("NOTIFY_USER_ID")
+        if channel_id:
+            asyncio.create_task(notify_active_games_task(bot=self, channel_id=int(channel_id)))
+        if user_id:
+            asyncio.create_task(notify_active_games_task(bot=self, user_id=int(user_id)))
+
+        if not channel_id and not user_id:
+            log.warning("Neither NOTIFY_CHANNEL_ID nor NOTIFY_USER_ID is set; define at least one in .env to get active game notifications")
+
+        # Warm the Riot caches in the background; only runs on the first connect
+        asyncio.create_task(warm_caches())
+
+    async def on_app_command_completion(self, interaction, command):
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        COMMAND_SECONDS.observe(elapsed, command=command.qualified_name)
+
+    async def close(self):
+        for task in (self.search_flush, self.baseline_refresh):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self.search_flush = self.baseline_refresh = None
+        loop_monitor.stop()
+        if self.http_runner is not None:
+            await self.http_runner.cleanup()
+            self.http_runner = None
+        await super().close()
+        # Final flush once the gateway is closed (no command can buffer more) and before the pool shuts down
+        await flush_pending_searches_async()
+        shutdown_db_executor()
+        close_pool()
+
+# Modules that are deferred until first use and should not show up in the startup imports
+DEFERRED_MODULES = ('openai', 'psycopg2', 'requests')
+
+def _import_times():
+    """(module, self µs, cumulative µs) of `import bot` in a fresh interpreter (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import bot'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+async def _time_setup_steps():
+    steps = []
+    for name, step in (
+        ("init_database", init_database_async),
+        ("load_summoner_index", load_summoner_index_async),
+        ("load_baselines", load_baselines_async),
+    ):
+        started = time.perf_counter()
+        await step()
+        steps.append((name, time.perf_counter() - started))
+    return steps
+
+def profile_startup(top: int = 15, configured_db: bool = False):
+    """Print where cold start time goes: module imports and the setup_hook steps, without connecting to Discord.
+
+    The setup steps run against a throwaway SQLite file unless configured_db is set, so profiling
+    never migrates or creates the real database.
+    """
+    rows = _import_times()
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    print(f"⏱️ import bot: {total_ms:.0f} ms en {len(rows)} módulos")
+
+    print(f"\nPaquetes más pesados (acumulado, top {top}):")
+    packages = sorted((row for row in rows if '.' not in row[0]), key=lambda row: row[2], reverse=True)
+    for name, _, cumulative_us in packages[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    imported = {name for name, _, _ in rows}
+    print("\nDiferidos hasta el primer uso:")
+    for name in DEFERRED_MODULES:
+        print(f"  {'⚠️ importado al iniciar' if name in imported else '✅ diferido':24} {name}")
+
+    tmp_dir = None
+    if not configured_db:
+        tmp_dir = tempfile.mkdtemp(prefix="capitan-profile-")
+        os.environ["DB_TYPE"] = "sqlite"
+        db.DB_PATH = os.path.join(tmp_dir, "summoners.db")
+    print(f"\nPasos de setup_hook ({'base de datos configurada' if configured_db else 'SQLite temporal vacía'}):")
+    try:
+        for name, seconds in asyncio.run(_time_setup_steps()):
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+    finally:
+        shutdown_db_executor()
+        close_pool()
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capitán Coditos, bot de Discord para LoL")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="muestra el tiempo de importación por módulo y de cada paso de arranque, sin conectarse a Discord")
+    parser.add_argument('--profile-db', action='store_true',
+                        help="con --profile-startup, mide los pasos contra la base de datos configurada (ejecuta sus migraciones)")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        return profile_startup(configured_db=args.profile_db)
+
+    # Our logs and discord.py's go through the same non-blocking queue
+    setup_logging()
+    CapitanCoditos().run(DISCORD_TOKEN, log_handler=None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,23 @@
 from .ultimapartida import register_ultimapartida
-from .analizarpartida import register_analizarpartida
-from .historialpartidas import register_historialpartidas
+from .analizarpartida import register_analizarpartida, TeamMemberButton
+from .historialpartidas import register_historialpartidas, MatchDetailButton
 from .dbstats import register_dbstats
+from .perfil import register_perfil
+from .ranking import register_ranking
+from .perf import register_perf
+from .profiler import register_profiler
+from .sync import command_tree_hash, sync_command_tree
 
 def register_commands(tree):
     register_ultimapartida(tree)
     register_analizarpartida(tree)
     register_historialpartidas(tree)
     register_dbstats(tree)
+    register_perfil(tree)
+    register_ranking(tree)
+    register_perf(tree)
+    register_profiler(tree)
+
+def register_persistent_views(client):
+    """Register the dynamic buttons once, so old messages keep working after a restart"""
+    client.add_dynamic_items(TeamMemberButton, MatchDetailButton)
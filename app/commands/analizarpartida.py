@@ -1,38 +1,26 @@
 import discord
 from discord import app_commands
-from utils.helpers import encontrar_peor_jugador, create_stats_dict, get_player_name, format_kda, get_match_result_info, handle_command_error, get_champion_icon_url, get_match_analysis_data, create_ultima_partida_embed
+from utils.helpers import encontrar_peor_jugador, create_stats_dict, get_player_name, get_player_riot_id, format_kda, get_match_result_info, handle_command_error, get_champion_icon_url, create_ultima_partida_embed, get_participant_baseline, set_profile_author
 from utils.autocomplete import riot_id_autocomplete
+from riot.api import fetch_match, get_participant_latest_match, get_player_match_data
 from ai.openai_service import generar_mensaje_openai
-from database import save_summoner
+from database import save_summoner_async
+from utils.embed_cache import get_cached_embed, cache_embed
+from monitoring.tracing import traced, span, spanned
 
-def get_player_riot_id(participant):
-    """Extract full Riot ID from participant data (Name#Tag format)"""
-    game_name = participant.get('riotIdGameName')
-    tag_line = participant.get('riotIdTagline')  # Fixed: was 'riotIdTagLine'
-    
-    # Debug logging
-    #print(f"Debug: game_name='{game_name}', tag_line='{tag_line}'")
-    
-    if game_name and tag_line:
-        riot_id = f"{game_name}#{tag_line}"
-        #print(f"Debug: Created Riot ID: {riot_id}")
-        return riot_id
-    
-    # If we don't have both parts, we can't create a valid Riot ID
-    # Return None so the button gets disabled
-    #print(f"Debug: Cannot create Riot ID, missing data")
-    return None
-
-async def show_player_ultima_partida(interaction: discord.Interaction, riot_id: str):
-    """Helper function to show a player's last match - simplified using shared functions"""
-    await interaction.response.defer()
+async def show_player_ultima_partida(interaction: discord.Interaction, riot_id: str, puuid: str = None, match_data=None):
+    """Show a player's last match on an already deferred interaction.
 
+    With the PUUID (an ally of a loaded match) the loaded match is reused.
+    """
     try:
-        embed = await create_ultima_partida_embed(riot_id)
+        preloaded = await get_participant_latest_match(puuid, match_data) if puuid else None
+        embed = await create_ultima_partida_embed(riot_id, preloaded)
         await interaction.followup.send(embed=embed)
     except Exception as e:
         await handle_command_error(interaction, e)
 
+@spanned("embed")
 async def create_simple_team_analysis_embed(riot_id: str, participant, match_data, game_duration, summoner_profile=None):
     """Create a simple team analysis embed for remake/very short matches without AI analysis"""
     from utils.helpers import parse_riot_id, get_match_result_info, get_summoner_icon_url
@@ -53,7 +41,7 @@ async def create_simple_team_analysis_embed(riot_id: str, participant, match_dat
     
     # Create Discord embed
     embed = discord.Embed(
-        title=f"Análisis de partida de {riot_id}",
+        title=f"Análisis de partida de {get_player_riot_id(participant) or riot_id}",
         description=f"🕒 {game_duration} minutos | 🕹️ {resultado}",
         color=0x00ff00 if resultado == "Victoria" else 0xff0000
     )
@@ -91,53 +79,79 @@ async def create_simple_team_analysis_embed(riot_id: str, participant, match_dat
     
     return embed
 
+class TeamMemberButton(discord.ui.DynamicItem[discord.ui.Button], template=r'cc:ally:(?P<match_id>[A-Za-z0-9]+_\d+):(?P<participant_id>\d+)'):
+    """Persistent button that shows an ally's last match.
+
+    The custom_id carries the match_id and the ally's participant slot; the Riot ID is
+    read back from the match when clicked, so the button survives restarts.
+    """
+
+    def __init__(self, match_id: str, participant_id: int, label: str = None, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label=label or f"Jugador {participant_id}",
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"cc:ally:{match_id}:{participant_id}",
+                disabled=disabled  # Disabled when the ally has no valid Riot ID
+            )
+        )
+        self.match_id = match_id
+        self.participant_id = participant_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['match_id'], int(match['participant_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        # Acknowledge first: fetch_match may have to download the match from Riot
+        await interaction.response.defer()
+        
+        try:
+            match_data = await fetch_match(self.match_id)
+            jugador = next(
+                p for p in match_data["info"]["participants"] if p.get("participantId") == self.participant_id
+            )
+        except Exception as e:
+            await interaction.followup.send(f"❌ No se pudo cargar la partida: {e}", ephemeral=True)
+            return
+        
+        player_riot_id = get_player_riot_id(jugador)
+        if player_riot_id is None:
+            await interaction.followup.send(
+                f"❌ No se puede obtener información de {get_player_name(jugador)} (Riot ID no disponible)",
+                ephemeral=True
+            )
+            return
+        
+        # Usually the ally's latest match is the one already loaded: only the match list is checked
+        await show_player_ultima_partida(interaction, player_riot_id, jugador["puuid"], match_data)
+
 class TeamMemberView(discord.ui.View):
-    def __init__(self, aliados):
-        super().__init__(timeout=300)  # 5 minutes timeout
-        self.aliados = aliados
+    def __init__(self, match_id, aliados):
+        # Only persistent dynamic buttons: the view never times out and keeps no match data
+        super().__init__(timeout=None)
         
         # Add buttons for each team member (max 5 buttons per row, 25 total)
-        for i, jugador in enumerate(aliados[:5]):  # Limit to 5 players max
+        for jugador in aliados[:5]:  # Limit to 5 players max
             player_name = get_player_name(jugador)
-            player_riot_id = get_player_riot_id(jugador)
-            
-            button = discord.ui.Button(
+            self.add_item(TeamMemberButton(
+                match_id,
+                jugador['participantId'],
                 label=f"{player_name} ({jugador['championName']})",
-                style=discord.ButtonStyle.secondary,
-                custom_id=f"player_{i}",
-                disabled=(player_riot_id is None)  # Disable button if no valid Riot ID
-            )
-            
-            if player_riot_id:
-                button.callback = self.create_callback(player_riot_id)
-            else:
-                # Create a disabled callback that shows an error message
-                button.callback = self.create_disabled_callback(player_name)
-            
-            self.add_item(button)
-    
-    def create_callback(self, riot_id):
-        async def button_callback(interaction):
-            # Show the player's last match using our helper function
-            await show_player_ultima_partida(interaction, riot_id)
-        return button_callback
-    
-    def create_disabled_callback(self, player_name):
-        async def disabled_callback(interaction):
-            await interaction.response.send_message(
-                f"❌ No se puede obtener información de {player_name} (Riot ID no disponible)",
-                ephemeral=True
-            )
-        return disabled_callback
+                disabled=(get_player_riot_id(jugador) is None)
+            ))
 
+@traced("analizarpartida")
 async def analizar_partida(interaction: discord.Interaction, invocador: str):
-    await interaction.response.defer()
+    with span("discord"):
+        await interaction.response.defer()
 
     try:
         # Save summoner to database
-        save_summoner(invocador)
+        await save_summoner_async(invocador)
         
-        participant, match_data, game_duration, game_name, stats, game_mode, summoner_profile = await get_match_analysis_data(invocador)
+        # Only the match is loaded here: the analysis is of the worst ally, built after the cache check
+        participant, match_data, game_duration, summoner_profile = await get_player_match_data(invocador)
         
         # Import the validation function
         from utils.helpers import is_valid_match_for_analysis
@@ -146,7 +160,8 @@ async def analizar_partida(interaction: discord.Interaction, invocador: str):
         if not is_valid_match_for_analysis(match_data, participant):
             # For remake/very short games, show a simple message instead of team analysis
             embed = await create_simple_team_analysis_embed(invocador, participant, match_data, game_duration, summoner_profile)
-            await interaction.followup.send(embed=embed)
+            with span("discord"):
+                await interaction.followup.send(embed=embed)
             return
         
         participants = match_data['info']['participants']
@@ -155,10 +170,21 @@ async def analizar_partida(interaction: discord.Interaction, invocador: str):
         player_team = participant['teamId']
         aliados = [p for p in participants if p['teamId'] == player_team]
         
+        # A repeat analysis of the same match reuses the rendered embed and its AI roast
+        match_id = match_data['metadata']['matchId']
+        embed = get_cached_embed(match_id, participant['puuid'], "analisis_equipo")
+        if embed is not None:
+            # The level may have changed since the embed was cached
+            set_profile_author(embed, summoner_profile)
+            with span("discord"):
+                await interaction.followup.send(embed=embed, view=TeamMemberView(match_id, aliados))
+            return
+        
         # Analyze the worst player from the ally team
-        peor_nombre, peor_stats, _ = encontrar_peor_jugador(aliados)
+        with span("analysis"):
+            peor_nombre, peor_stats, _ = encontrar_peor_jugador(aliados, game_duration)
+            stats = create_stats_dict(peor_stats, game_duration, get_participant_baseline(peor_stats, match_data))
         game_mode = match_data["info"].get("gameMode", "Desconocido")
-        stats = create_stats_dict(peor_stats, game_duration)
         mensaje = await generar_mensaje_openai(peor_nombre, stats, peor_stats, game_mode)
         
         # Get match result info
@@ -195,8 +221,9 @@ async def analizar_partida(interaction: discord.Interaction, invocador: str):
             split_team = True
         else:
             split_team = False        # Create Discord embed
+        # Cached per player: the title uses their Riot ID as stored by Riot, not the requester's spelling
         embed = discord.Embed(
-            title=f"Análisis de partida de {invocador}",
+            title=f"Análisis de partida de {get_player_riot_id(participant) or invocador}",
             description=f"🕒 {game_duration} minutos | 🕹️ {resultado}",
             color=0x00ff00 if resultado == "Victoria" else 0xff0000
         )
@@ -238,17 +265,17 @@ async def analizar_partida(interaction: discord.Interaction, invocador: str):
         embed.set_thumbnail(url=champion_icon_url)
         
         # Set summoner profile icon if available
-        if summoner_profile:
-            from utils.helpers import get_summoner_icon_url
-            profile_icon_url = get_summoner_icon_url(summoner_profile['profileIconId'])
-            embed.set_author(name=f"Nivel {summoner_profile['summonerLevel']}", icon_url=profile_icon_url)
+        set_profile_author(embed, summoner_profile)
         
         embed.set_footer(text="CapitanCoditos, Tu afk favorito. • Haz clic en un jugador para ver su última partida.")
         
+        cache_embed(match_id, participant['puuid'], "analisis_equipo", embed)
+        
         # Create view with clickable buttons
-        view = TeamMemberView(aliados)
+        view = TeamMemberView(match_id, aliados)
         
-        await interaction.followup.send(embed=embed, view=view)
+        with span("discord"):
+            await interaction.followup.send(embed=embed, view=view)
     except Exception as e:
         await handle_command_error(interaction, e)
 
@@ -1,6 +1,6 @@
 import discord
 from discord import app_commands
-from database import get_summoner_stats
+from database import get_summoner_stats_async
 from utils.helpers import handle_command_error
 
 async def db_stats(interaction: discord.Interaction):
@@ -8,7 +8,7 @@ async def db_stats(interaction: discord.Interaction):
     await interaction.response.defer()
 
     try:
-        stats = get_summoner_stats()
+        stats = await get_summoner_stats_async()
         
         embed = discord.Embed(
             title="📊 Estadísticas de la Base de Datos",
@@ -35,6 +35,39 @@ async def db_stats(interaction: discord.Interaction):
                 inline=True
             )
         
+        embed.add_field(
+            name="📅 Búsquedas Hoy",
+            value=f"**{stats.get('searches_today', 0)}** realizadas",
+            inline=True
+        )
+        
+        # Cache de partidas: aciertos = memoria o base local, fallos = descarga desde Riot
+        hits = stats.get('match_cache_hits', 0)
+        lookups = hits + stats.get('match_cache_misses', 0)
+        hit_ratio = f"{hits / lookups * 100:.0f}%" if lookups else "N/A"
+        embed.add_field(
+            name="💾 Partidas en Caché",
+            value=f"**{stats.get('cached_matches', 0)}** guardadas | **{hit_ratio}** aciertos",
+            inline=True
+        )
+        
+        daily = stats.get('daily_searches', [])
+        if daily:
+            embed.add_field(
+                name="🗓️ Últimos 7 días",
+                value="\n".join(f"`{day}` {searches}" for day, searches in daily),
+                inline=False
+            )
+        
+        for key, title in (('top_24h', "🔥 Más buscados (24 h)"), ('top_7d', "🏆 Más buscados (7 días)")):
+            top = stats.get(key, [])
+            if top:
+                embed.add_field(
+                    name=title,
+                    value="\n".join(f"`{i}.` **{riot_id}** - {searches}" for i, (riot_id, searches) in enumerate(top, 1)),
+                    inline=True
+                )
+        
         embed.set_footer(text="CapitanCoditos, Tu afk favorito.")
         
         await interaction.followup.send(embed=embed)
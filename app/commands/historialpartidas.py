@@ -1,71 +1,105 @@
 import discord
 from discord import app_commands
-from riot.api import get_player_multiple_matches
-from utils.helpers import create_match_history_embed, create_ultima_partida_embed, handle_command_error, parse_riot_id, create_stats_dict, get_match_result_info, format_kda, get_summoner_icon_url, is_valid_match_for_analysis
+from riot.api import get_player_multiple_matches, fetch_match, get_cached_profile
+from utils.helpers import create_match_history_embed, create_ultima_partida_embed, handle_command_error, create_stats_dict, get_match_result_info, format_kda, get_summoner_icon_url, is_valid_match_for_analysis, get_player_name, get_player_riot_id, get_participant_baseline, add_percentiles_field
 from utils.autocomplete import riot_id_autocomplete
 from ai.openai_service import generar_mensaje_openai
-from database import save_summoner
+from database import save_summoner_async
+from utils.embed_cache import get_cached_embed, cache_embed
+from monitoring.tracing import traced, span, spanned
+
+class MatchDetailButton(discord.ui.DynamicItem[discord.ui.Button], template=r'cc:hist:(?P<match_id>[A-Za-z0-9]+_\d+):(?P<participant_id>\d+):(?P<number>\d+)'):
+    """Persistent button that opens the detail of one match of a history.
+
+    The custom_id carries the match_id, the participant slot (which resolves the puuid
+    from the match) and the position in the history, so it keeps working after a restart.
+    """
+
+    def __init__(self, match_id: str, participant_id: int, match_number: int, label: str = None, style=discord.ButtonStyle.secondary):
+        super().__init__(
+            discord.ui.Button(
+                label=label or f"Partida {match_number}",
+                style=style,
+                custom_id=f"cc:hist:{match_id}:{participant_id}:{match_number}"
+            )
+        )
+        self.match_id = match_id
+        self.participant_id = participant_id
+        self.match_number = match_number
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['match_id'], int(match['participant_id']), int(match['number']))
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        
+        try:
+            # Rehydrate the match from the local cache (memory, then match store, then Riot)
+            match_data = await fetch_match(self.match_id)
+            participant = next(
+                p for p in match_data["info"]["participants"] if p.get("participantId") == self.participant_id
+            )
+            # Display name only: players without a Riot ID keep their summoner name
+            riot_id = get_player_riot_id(participant) or get_player_name(participant)
+            game_duration = match_data["info"]["gameDuration"] // 60
+            summoner_profile = get_cached_profile(participant["puuid"])
+            
+            # Reuse the rendered detail (and its AI analysis) if this match was opened before
+            kind = f"detalle:{self.match_number}"
+            embed = get_cached_embed(self.match_id, participant["puuid"], kind)
+            if embed is not None:
+                await interaction.followup.send(embed=embed)
+                return
+            
+            # Check if match is valid for analysis
+            if not is_valid_match_for_analysis(match_data, participant):
+                # Create simple embed without AI analysis for remake/very short games
+                embed = await create_simple_match_detail_embed(
+                    riot_id, participant, match_data, game_duration, self.match_number, summoner_profile
+                )
+            else:
+                # Create detailed analysis for this specific match
+                game_name = get_player_name(participant)
+                stats = create_stats_dict(participant, game_duration, get_participant_baseline(participant, match_data))
+                game_mode = match_data["info"]["gameMode"] or "Desconocido"
+                
+                # Generate AI analysis for this specific match
+                mensaje_openai = await generar_mensaje_openai(game_name, stats, participant, game_mode)
+                
+                # Create detailed embed for this match
+                embed = await create_match_detail_embed(
+                    riot_id, participant, match_data, game_duration, mensaje_openai, self.match_number, summoner_profile
+                )
+            
+            cache_embed(self.match_id, participant["puuid"], kind, embed)
+            await interaction.followup.send(embed=embed)
+            
+        except Exception as e:
+            await handle_command_error(interaction, e)
 
 class MatchHistoryView(discord.ui.View):
-    def __init__(self, riot_id: str, match_results, summoner_profile=None):
-        super().__init__(timeout=300)  # 5 minutes timeout
-        self.riot_id = riot_id
-        self.match_results = match_results
-        self.summoner_profile = summoner_profile
+    def __init__(self, match_results):
+        # Only persistent dynamic buttons: the view never times out and keeps no match data
+        super().__init__(timeout=None)
         
         # Add buttons for each match (max 5)
         for i, (participant, match_data, game_duration, match_id) in enumerate(match_results[:5]):
             champ = participant["championName"]
             resultado, emoji = get_match_result_info(participant)
             
-            button = discord.ui.Button(
+            self.add_item(MatchDetailButton(
+                match_id,
+                participant["participantId"],
+                i + 1,
                 label=f"{emoji} {champ} ({i+1})",
-                style=discord.ButtonStyle.success if resultado == "Victoria" else discord.ButtonStyle.danger,
-                custom_id=f"match_{i}"
-            )
-            button.callback = self.create_match_callback(i)
-            self.add_item(button)
-    
-    def create_match_callback(self, match_index):
-        async def match_callback(interaction):
-            await interaction.response.defer()
-            
-            try:
-                # Get match data for specific match
-                participant, match_data, game_duration, match_id = self.match_results[match_index]
-                
-                # Check if match is valid for analysis
-                if not is_valid_match_for_analysis(match_data, participant):
-                    # Create simple embed without AI analysis for remake/very short games
-                    embed = await create_simple_match_detail_embed(
-                        self.riot_id, participant, match_data, game_duration, match_index + 1, self.summoner_profile
-                    )
-                else:
-                    # Create detailed analysis for this specific match
-                    game_name = parse_riot_id(self.riot_id)[0]
-                    stats = create_stats_dict(participant, game_duration)
-                    game_mode = match_data["info"]["gameMode"] or "Desconocido"
-                    
-                    # Generate AI analysis for this specific match
-                    mensaje_openai = await generar_mensaje_openai(game_name, stats, participant, game_mode)
-                    
-                    # Create detailed embed for this match
-                    embed = await create_match_detail_embed(
-                        self.riot_id, participant, match_data, game_duration, mensaje_openai, match_index + 1, self.summoner_profile
-                    )
-                
-                await interaction.followup.send(embed=embed)
-                
-            except Exception as e:
-                await handle_command_error(interaction, e)
-        
-        return match_callback
+                style=discord.ButtonStyle.success if resultado == "Victoria" else discord.ButtonStyle.danger
+            ))
 
+@spanned("embed")
 async def create_simple_match_detail_embed(riot_id: str, participant, match_data, game_duration, match_number: int, summoner_profile=None):
     """Create simple embed for remake/very short matches without AI analysis"""
-    from app.utils.helpers import get_champion_icon_url
-    
-    game_name = parse_riot_id(riot_id)[0]
+    from utils.helpers import get_champion_icon_url
     
     champ = participant["championName"]
     kda = format_kda(participant)
@@ -127,12 +161,11 @@ async def create_simple_match_detail_embed(riot_id: str, participant, match_data
     
     return embed
 
+@spanned("embed")
 async def create_match_detail_embed(riot_id: str, participant, match_data, game_duration, analysis_message: str, match_number: int, summoner_profile=None):
     """Create detailed embed for a specific match"""
     from utils.helpers import get_champion_icon_url
     
-    game_name = parse_riot_id(riot_id)[0]
-    
     champ = participant["championName"]
     kda = format_kda(participant)
     resultado, _ = get_match_result_info(participant)
@@ -177,6 +210,7 @@ async def create_match_detail_embed(riot_id: str, participant, match_data, game_
         value=analysis_message,
         inline=False
     )
+    add_percentiles_field(embed, get_participant_baseline(participant, match_data))
     
     embed.set_thumbnail(url=champion_icon_url)
     
@@ -189,27 +223,31 @@ async def create_match_detail_embed(riot_id: str, participant, match_data, game_
     
     return embed
 
+@traced("historialpartidas")
 async def historial_partidas(interaction: discord.Interaction, riot_id: str):
-    await interaction.response.defer()
+    with span("discord"):
+        await interaction.response.defer()
 
     try:
         # Save summoner to database
-        save_summoner(riot_id)
+        await save_summoner_async(riot_id)
         
         # Get last 5 matches with summoner profile
         match_results, summoner_profile = await get_player_multiple_matches(riot_id, count=5)
         
         if not match_results:
-            await interaction.followup.send("❌ No se encontraron partidas recientes para este jugador.")
+            with span("discord"):
+                await interaction.followup.send("❌ No se encontraron partidas recientes para este jugador.")
             return
         
         # Create main embed with match history
         embed = await create_match_history_embed(riot_id, match_results, summoner_profile)
         
         # Create view with clickable buttons
-        view = MatchHistoryView(riot_id, match_results, summoner_profile)
+        view = MatchHistoryView(match_results)
         
-        await interaction.followup.send(embed=embed, view=view)
+        with span("discord"):
+            await interaction.followup.send(embed=embed, view=view)
         
     except Exception as e:
         await handle_command_error(interaction, e)
@@ -0,0 +1,55 @@
+import discord
+from discord import app_commands
+from monitoring.tracing import summarize, traces, TRACE_BUFFER_SIZE
+from utils.helpers import handle_command_error, require_owner
+
+TRACED_COMMANDS = ('ultimapartida', 'analizarpartida', 'historialpartidas')
+
+def _ms(seconds):
+    return f"{seconds * 1000:,.0f} ms"
+
+def _format_summary(summary):
+    """Code block with p50/p95 of the total and of every stage"""
+    lines = [f"{'etapa':<17}{'p50':>10}{'p95':>10}"]
+    lines.append(f"{'total':<17}{_ms(summary['total'][0]):>10}{_ms(summary['total'][1]):>10}")
+    for stage, (p50, p95) in summary['stages'].items():
+        lines.append(f"{stage:<17}{_ms(p50):>10}{_ms(p95):>10}")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+async def perf(interaction: discord.Interaction, comando: str = None):
+    """Show the p50/p95 stage breakdown of the recent traced commands (bot owner only)"""
+    if not await require_owner(interaction):
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    try:
+        summaries = summarize(comando)
+        embed = discord.Embed(
+            title="⏱️ Rendimiento por etapa",
+            description=f"Últimas {len(traces)} ejecuciones (máximo {TRACE_BUFFER_SIZE}). "
+                        "Cada etapa cuenta solo su tiempo propio.",
+            color=0x0099ff
+        )
+        for name in sorted(summaries, key=lambda n: TRACED_COMMANDS.index(n) if n in TRACED_COMMANDS else len(TRACED_COMMANDS)):
+            summary = summaries[name]
+            embed.add_field(
+                name=f"/{name} · {summary['count']} ejecuciones · {summary['errors']} errores",
+                value=_format_summary(summary),
+                inline=False
+            )
+        if not summaries:
+            embed.add_field(name="Sin datos", value="Todavía no hay ejecuciones registradas.", inline=False)
+
+        embed.set_footer(text="CapitanCoditos, Tu afk favorito.")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    except Exception as e:
+        await handle_command_error(interaction, e)
+
+def register_perf(tree):
+    @app_commands.describe(comando="Limitar a un comando")
+    @app_commands.choices(comando=[app_commands.Choice(name=f"/{name}", value=name) for name in TRACED_COMMANDS])
+    @app_commands.default_permissions(administrator=True)
+    @tree.command(name="perf", description="Tiempos por etapa de los comandos recientes (solo dueño del bot)")
+    async def command(interaction: discord.Interaction, comando: str = None):
+        await perf(interaction, comando)
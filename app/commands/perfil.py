@@ -0,0 +1,124 @@
+import asyncio
+import discord
+from discord import app_commands
+from riot.api import sync_recent_matches
+from utils.helpers import handle_command_error
+from utils.autocomplete import riot_id_autocomplete
+from database import run_db, save_summoner_async, find_puuid, get_player_profile, MIN_PROFILE_MATCHES, MAX_PROFILE_MATCHES
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+ROLE_NAMES = {
+    'TOP': "Top",
+    'JUNGLE': "Jungla",
+    'MIDDLE': "Medio",
+    'BOTTOM': "Tirador",
+    'UTILITY': "Soporte",
+    'NONE': "Sin rol",
+}
+
+# Refreshes in flight by Riot ID; also keeps the tasks from being garbage collected mid-flight
+_refresh_tasks = {}
+
+async def _refresh_profile(riot_id: str, partidas: int):
+    try:
+        await sync_recent_matches(riot_id, partidas)
+    except Exception as e:
+        log.warning("Error refreshing profile", riot_id=riot_id, error=e)
+
+def _refresh_in_background(riot_id: str, partidas: int):
+    key = riot_id.lower()
+    if key in _refresh_tasks:
+        return
+    task = asyncio.create_task(_refresh_profile(riot_id, partidas))
+    _refresh_tasks[key] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(key, None))
+
+def create_profile_embed(riot_id: str, profile: dict):
+    """Embed with the recent window and all-time totals of a player"""
+    recent, lifetime = profile['recent'], profile['lifetime']
+    winrate = recent['winrate']
+    embed = discord.Embed(
+        title=f"Perfil de {profile['riot_id'] or riot_id}",
+        description=f"Últimas **{recent['games']}** partidas guardadas",
+        color=0x00ff00 if winrate >= 50 else 0xff9900 if winrate >= 30 else 0xff0000
+    )
+
+    embed.add_field(
+        name="🏆 Winrate",
+        value=f"**{winrate:.0f}%** ({recent['wins']}V / {recent['games'] - recent['wins']}D)",
+        inline=True
+    )
+    embed.add_field(
+        name="⚔️ KDA",
+        value=f"**{recent['kda']:.2f}** ({recent['kills']:.1f}/{recent['deaths']:.1f}/{recent['assists']:.1f})",
+        inline=True
+    )
+    embed.add_field(
+        name="🌾 CS/min",
+        value=f"**{recent['cs_per_min']:.1f}**",
+        inline=True
+    )
+
+    if recent['champions']:
+        embed.add_field(
+            name="🎯 Campeones más jugados",
+            value="\n".join(
+                f"`{i}.` **{champion}** - {games} partidas ({wr:.0f}% WR)"
+                for i, (champion, games, wr) in enumerate(recent['champions'], 1)
+            ),
+            inline=True
+        )
+    if recent['roles']:
+        embed.add_field(
+            name="🗺️ Roles",
+            value="\n".join(f"{ROLE_NAMES.get(role, role)}: **{share:.0f}%**" for role, share in recent['roles']),
+            inline=True
+        )
+
+    embed.add_field(
+        name="📚 Histórico",
+        value=f"**{lifetime['games']}** partidas | **{lifetime['winrate']:.0f}%** WR | **{lifetime['kda']:.2f}** KDA",
+        inline=False
+    )
+
+    embed.set_footer(text="CapitanCoditos, Tu afk favorito. • Las partidas nuevas se suman al perfil automáticamente.")
+    return embed
+
+async def perfil(interaction: discord.Interaction, riot_id: str, partidas: int):
+    await interaction.response.defer()
+
+    try:
+        await save_summoner_async(riot_id)
+
+        puuid = await run_db(find_puuid, riot_id)
+        profile = await run_db(get_player_profile, puuid, partidas) if puuid else None
+        if profile is None:
+            # Unknown player: nothing stored to answer from, so a bounded first batch is awaited
+            puuid = await sync_recent_matches(riot_id, partidas)
+            profile = await run_db(get_player_profile, puuid, partidas)
+        else:
+            # Answer from the store right away (even a thin history) and pick up new matches for the next call
+            _refresh_in_background(riot_id, partidas)
+
+        if profile is None:
+            raise ValueError("No se encontraron partidas para este jugador.")
+
+        await interaction.followup.send(embed=create_profile_embed(riot_id, profile))
+    except Exception as e:
+        await handle_command_error(interaction, e)
+
+def register_perfil(tree):
+    @app_commands.describe(
+        riot_id="Tu Riot ID completo (ej: Roga#LAN)",
+        partidas=f"Cantidad de partidas a resumir ({MIN_PROFILE_MATCHES}-{MAX_PROFILE_MATCHES})"
+    )
+    @app_commands.autocomplete(riot_id=riot_id_autocomplete)
+    @tree.command(name="perfil", description="Resumen de winrate, KDA, campeones y roles de tus últimas partidas")
+    async def command(
+        interaction: discord.Interaction,
+        riot_id: str,
+        partidas: app_commands.Range[int, MIN_PROFILE_MATCHES, MAX_PROFILE_MATCHES] = MIN_PROFILE_MATCHES
+    ):
+        await perfil(interaction, riot_id, partidas)
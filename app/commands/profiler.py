@@ -0,0 +1,57 @@
+import asyncio
+import io
+import discord
+from discord import app_commands
+from monitoring.profiling import (
+    sample_cpu, format_cpu_profile, start_memory_trace, memory_diff, stop_memory_trace, object_report
+)
+from utils.helpers import handle_command_error, require_owner
+
+# Longest report shown inline; the full one is always attached
+INLINE_REPORT_CHARS = 1800
+
+async def _run_action(interaction, accion, segundos):
+    # Everything runs in a worker thread: the CPU sampler must not block the loop it is sampling
+    if accion == "cpu":
+        return format_cpu_profile(await asyncio.to_thread(sample_cpu, segundos))
+    if accion == "memoria_inicio":
+        return await asyncio.to_thread(start_memory_trace)
+    if accion == "memoria_diff":
+        return await asyncio.to_thread(memory_diff)
+    if accion == "memoria_fin":
+        return stop_memory_trace()
+    return await asyncio.to_thread(object_report, interaction.client)
+
+async def profiler(interaction: discord.Interaction, accion: str, segundos: int = 10):
+    """Profile the running bot: CPU samples, tracemalloc diffs or object counts (bot owner only)"""
+    if not await require_owner(interaction):
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    try:
+        report = await _run_action(interaction, accion, segundos)
+        inline = report if len(report) <= INLINE_REPORT_CHARS else report[:INLINE_REPORT_CHARS] + "\n…"
+        await interaction.followup.send(
+            f"```\n{inline}\n```",
+            file=discord.File(io.BytesIO(report.encode()), filename=f"profiler_{accion}.txt"),
+            ephemeral=True
+        )
+    except RuntimeError as e:
+        await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
+    except Exception as e:
+        await handle_command_error(interaction, e)
+
+def register_profiler(tree):
+    @app_commands.describe(accion="Qué medir", segundos="Duración del muestreo de CPU")
+    @app_commands.choices(accion=[
+        app_commands.Choice(name="CPU (muestreo)", value="cpu"),
+        app_commands.Choice(name="Memoria: iniciar tracemalloc", value="memoria_inicio"),
+        app_commands.Choice(name="Memoria: diferencia desde el inicio", value="memoria_diff"),
+        app_commands.Choice(name="Memoria: detener tracemalloc", value="memoria_fin"),
+        app_commands.Choice(name="Objetos y cachés", value="objetos"),
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @tree.command(name="profiler", description="Perfil de CPU y memoria del bot en ejecución (solo dueño del bot)")
+    async def command(interaction: discord.Interaction, accion: str, segundos: app_commands.Range[int, 1, 60] = 10):
+        await profiler(interaction, accion, segundos)
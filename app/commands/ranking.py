@@ -0,0 +1,59 @@
+import discord
+from discord import app_commands
+from database import run_db, get_leaderboard, LEADERBOARD_MIN_GAMES
+from utils.helpers import handle_command_error
+
+RANKING_SIZE = 10
+
+ORDER_TITLES = {
+    'winrate': "🏆 Ranking por Winrate",
+    'kda': "⚔️ Ranking por KDA",
+    'semana': "📅 Más partidas esta semana",
+    'peor': "💀 Ranking de Peor Jugador",
+}
+
+def _format_entry(order, entry):
+    if order == 'winrate':
+        return f"**{entry['winrate']:.0f}%** WR ({entry['games']} partidas)"
+    if order == 'kda':
+        return f"**{entry['kda']:.2f}** KDA ({entry['games']} partidas)"
+    if order == 'semana':
+        return f"**{entry['week_games']}** partidas"
+    return f"**{entry['worst_count']}** veces el peor ({entry['games']} partidas)"
+
+async def ranking(interaction: discord.Interaction, orden: str):
+    """Show the tracked summoners' standings"""
+    await interaction.response.defer()
+
+    try:
+        entries = await run_db(get_leaderboard, orden, RANKING_SIZE)
+
+        embed = discord.Embed(title=ORDER_TITLES[orden], color=0xffd700)
+        if entries:
+            embed.description = "\n".join(
+                f"`{i}.` **{entry['riot_id']}** - {_format_entry(orden, entry)}"
+                for i, entry in enumerate(entries, 1)
+            )
+        else:
+            embed.description = "Todavía no hay jugadores en este ranking."
+
+        footer = "CapitanCoditos, Tu afk favorito. • Solo invocadores buscados en el servidor."
+        if orden in ('winrate', 'kda'):
+            footer += f" Mínimo {LEADERBOARD_MIN_GAMES} partidas."
+        embed.set_footer(text=footer)
+
+        await interaction.followup.send(embed=embed)
+    except Exception as e:
+        await handle_command_error(interaction, e)
+
+def register_ranking(tree):
+    @app_commands.describe(orden="Criterio del ranking")
+    @app_commands.choices(orden=[
+        app_commands.Choice(name="Winrate", value="winrate"),
+        app_commands.Choice(name="KDA", value="kda"),
+        app_commands.Choice(name="Partidas esta semana", value="semana"),
+        app_commands.Choice(name="Veces peor jugador", value="peor"),
+    ])
+    @tree.command(name="ranking", description="Ranking de los invocadores seguidos en el servidor")
+    async def command(interaction: discord.Interaction, orden: str = "winrate"):
+        await ranking(interaction, orden)
@@ -0,0 +1,34 @@
+# Sync the slash commands with Discord only when their definitions change
+import hashlib
+import json
+import os
+from database import run_db, get_meta, set_meta
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+# Set to 1 to sync even if the stored hash matches (e.g. after deleting commands by hand)
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "0") == "1"
+
+def command_tree_hash(tree) -> str:
+    """Stable hash of every registered command's schema, as sent to Discord."""
+    schema = sorted((cmd.to_dict(tree) for cmd in tree.get_commands()), key=lambda cmd: cmd['name'])
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+async def sync_command_tree(tree, application_id) -> bool:
+    """Sync the global commands if their schema hash differs from the last synced one. Returns True if synced."""
+    key = f"command_tree_hash:{application_id}"
+    current = command_tree_hash(tree)
+    if not FORCE_COMMAND_SYNC and await run_db(get_meta, key) == current:
+        log.info("Command tree unchanged, skipping sync", hash=current[:12])
+        return False
+
+    try:
+        synced = await tree.sync()
+    except Exception as e:
+        # The old commands keep working; the hash is not stored so the next start retries
+        log.error("Error syncing commands", error=e)
+        return False
+    await run_db(set_meta, key, current)
+    log.info("Command tree synced", hash=current[:12], commands=",".join(cmd.name for cmd in synced))
+    return True
@@ -2,17 +2,21 @@ import discord
 from discord import app_commands
 from utils.helpers import create_ultima_partida_embed, handle_command_error
 from utils.autocomplete import riot_id_autocomplete
-from database import save_summoner
+from database import save_summoner_async
+from monitoring.tracing import traced, span
 
+@traced("ultimapartida")
 async def ultimapartida(interaction: discord.Interaction, riot_id: str):
-    await interaction.response.defer()
+    with span("discord"):
+        await interaction.response.defer()
 
     try:
         # Save summoner to database
-        save_summoner(riot_id)
+        await save_summoner_async(riot_id)
         
         embed = await create_ultima_partida_embed(riot_id)
-        await interaction.followup.send(embed=embed)
+        with span("discord"):
+            await interaction.followup.send(embed=embed)
     except Exception as e:
         await handle_command_error(interaction, e)
 
@@ -1,4 +1,23 @@
 # Database module for storing summoner data
-from .summoners import save_summoner, get_summoners_for_autocomplete, get_summoner_stats
+from .summoners import init_database, save_summoner, get_summoners_for_autocomplete, get_summoner_stats, load_summoner_index, flush_pending_searches
+from .summoner_index import summoner_index
+from .matches import save_match, get_stored_match, load_baselines
+from .rollups import increment_counter
+from .leaderboard import get_leaderboard, LEADERBOARD_ORDERS, LEADERBOARD_MIN_GAMES
+from .meta import get_meta, set_meta
+from .profiles import find_puuid, get_player_profile, get_stored_match_ids, MIN_PROFILE_MATCHES, MAX_PROFILE_MATCHES
+from .aio import (
+    run_db, submit_db, init_database_async, save_summoner_async, get_summoners_for_autocomplete_async, get_summoner_stats_async,
+    load_summoner_index_async, load_baselines_async, refresh_baselines_async, flush_pending_searches_async, search_flush_task,
+    baseline_refresh_task, shutdown_db_executor
+)
 
-__all__ = ['save_summoner', 'get_summoners_for_autocomplete', 'get_summoner_stats']
+__all__ = [
+    'init_database', 'init_database_async', 'save_summoner', 'get_summoners_for_autocomplete', 'get_summoner_stats', 'load_summoner_index',
+    'flush_pending_searches', 'summoner_index', 'save_match', 'get_stored_match', 'load_baselines',
+    'increment_counter', 'get_meta', 'set_meta', 'find_puuid', 'get_player_profile', 'get_stored_match_ids',
+    'MIN_PROFILE_MATCHES', 'MAX_PROFILE_MATCHES', 'get_leaderboard', 'LEADERBOARD_ORDERS', 'LEADERBOARD_MIN_GAMES',
+    'run_db', 'submit_db', 'save_summoner_async', 'get_summoners_for_autocomplete_async', 'get_summoner_stats_async',
+    'load_summoner_index_async', 'load_baselines_async', 'refresh_baselines_async', 'flush_pending_searches_async', 'search_flush_task',
+    'baseline_refresh_task', 'shutdown_db_executor'
+]
@@ -0,0 +1,94 @@
+# Async access to the database: every query runs on a dedicated executor
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from monitoring.metrics import DB_QUERY_SECONDS, DB_QUEUE_SECONDS
+from monitoring.tracing import span
+from utils.baselines import baselines, BASELINE_REFRESH_INTERVAL
+from .db import DB_POOL_MAX
+from .matches import load_baselines
+from .summoners import (
+    init_database, save_summoner, get_summoners_for_autocomplete, get_summoner_stats, load_summoner_index,
+    flush_pending_searches, SEARCH_FLUSH_INTERVAL
+)
+
+# One worker per pooled connection, so a query never waits on an exhausted pool
+_executor = None
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Return the executor reserved for database work."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+    return _executor
+
+def _timed(op, queued_at, call):
+    """Run call on an executor thread, recording its queue wait and run time."""
+    started = time.perf_counter()
+    DB_QUEUE_SECONDS.observe(started - queued_at, op=op)
+    try:
+        return call()
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, op=op)
+
+def submit_db(func, *args, **kwargs):
+    """Queue a database write without waiting for it (fire and forget)."""
+    return get_db_executor().submit(
+        _timed, func.__name__, time.perf_counter(), functools.partial(func, *args, **kwargs)
+    )
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database function without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    with span("db"):
+        return await loop.run_in_executor(
+            get_db_executor(), _timed, func.__name__, time.perf_counter(), functools.partial(func, *args, **kwargs)
+        )
+
+def shutdown_db_executor():
+    """Wait for queued queries and stop the executor."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+async def save_summoner_async(riot_id: str):
+    # Only touches in-memory buffers, so it does not need the executor
+    save_summoner(riot_id)
+
+async def get_summoners_for_autocomplete_async(query: str = "", limit: int = 10) -> List[str]:
+    return await run_db(get_summoners_for_autocomplete, query, limit)
+
+async def get_summoner_stats_async() -> dict:
+    return await run_db(get_summoner_stats)
+
+async def load_summoner_index_async():
+    return await run_db(load_summoner_index)
+
+async def init_database_async():
+    return await run_db(init_database)
+
+async def load_baselines_async():
+    return await run_db(load_baselines)
+
+async def refresh_baselines_async() -> int:
+    return await run_db(baselines.refresh)
+
+async def flush_pending_searches_async() -> int:
+    return await run_db(flush_pending_searches)
+
+async def search_flush_task(interval: float = SEARCH_FLUSH_INTERVAL):
+    """Periodically write buffered summoner searches in one batch."""
+    while True:
+        await asyncio.sleep(interval)
+        await flush_pending_searches_async()
+
+async def baseline_refresh_task(interval: float = BASELINE_REFRESH_INTERVAL):
+    """Periodically rebuild the percentile baselines of groups that received new matches."""
+    while True:
+        await asyncio.sleep(interval)
+        if baselines.pending:
+            await refresh_baselines_async()
@@ -1,33 +1,141 @@
 import os
 import sqlite3
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+from utils.log import get_logger
+
+log = get_logger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'summoners.db')
 
+# Pool sizing for PostgreSQL (connections are opened lazily up to the max)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "5"))
+
+# Resolved once by init_pool(); every later call reuses the same backend
+_db_type = None
+_pg_pool = None
+_sqlite_conn = None
+_sqlite_lock = threading.RLock()
+_init_lock = threading.Lock()
+
+def mask_url(url):
+    """Hide the password of a database URL so it can be logged safely."""
+    parts = urlsplit(url)
+    if parts.password is None:
+        return url
+    netloc = parts.netloc.replace(f":{parts.password}@", ":***@", 1)
+    return urlunsplit(parts._replace(netloc=netloc))
+
+def _open_sqlite():
+    """Open the process-wide SQLite connection in WAL mode."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def init_pool():
+    """Resolve the database configuration and open the long-lived connections.
+
+    Safe to call more than once; only the first call does any work.
+    """
+    global _db_type, _pg_pool, _sqlite_conn
+    if _db_type is not None:
+        return _db_type
+
+    with _init_lock:
+        if _db_type is not None:
+            return _db_type
+
+        db_type = os.getenv("DB_TYPE", "sqlite").lower()
+        postgres_url = os.getenv("POSTGRES_URL")
+
+        if db_type == "postgres" and postgres_url:
+            try:
+                # psycopg2 is only imported when PostgreSQL is actually configured
+                from psycopg2.extras import RealDictCursor
+                from psycopg2.pool import ThreadedConnectionPool
+                _pg_pool = ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX, postgres_url, cursor_factory=RealDictCursor
+                )
+                log.info("PostgreSQL pool ready", min=DB_POOL_MIN, max=DB_POOL_MAX, url=mask_url(postgres_url))
+                _db_type = "postgres"
+                return _db_type
+            except Exception as e:
+                log.error("PostgreSQL connection failed, falling back to SQLite", error=e)
+
+        _sqlite_conn = _open_sqlite()
+        log.info("Using SQLite (WAL)", path=DB_PATH)
+        _db_type = "sqlite"
+        return _db_type
+
+def get_db_type():
+    """Return the backend in use ('sqlite' or 'postgres')."""
+    return _db_type or init_pool()
+
+@contextmanager
 def get_connection():
-    # Get environment variables at runtime, not at import time
-    DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
-    POSTGRES_URL = os.getenv("POSTGRES_URL")
-    
-    print(f"[DEBUG] DB_TYPE: {DB_TYPE}, POSTGRES_URL: {POSTGRES_URL}")
-    if DB_TYPE == "postgres" and POSTGRES_URL:
+    """Borrow a connection; commits on success, rolls back on error and gives it back."""
+    if get_db_type() == "postgres":
+        conn = _pg_pool.getconn()
         try:
-            conn = psycopg2.connect(POSTGRES_URL, cursor_factory=RealDictCursor)
-            print("[DEBUG] PostgreSQL connection successful")
-            return conn
-        except Exception as e:
-            print(f"[DEBUG] PostgreSQL connection failed: {e}")
-            print("[DEBUG] Falling back to SQLite")
-            return sqlite3.connect(DB_PATH)
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            _pg_pool.putconn(conn, close=bool(conn.closed))
     else:
-        print("[DEBUG] Using SQLite")
-        return sqlite3.connect(DB_PATH)
+        with _sqlite_lock:
+            try:
+                yield _sqlite_conn
+                _sqlite_conn.commit()
+            except Exception:
+                _sqlite_conn.rollback()
+                raise
+
+def close_pool():
+    """Close every pooled connection (used on shutdown)."""
+    global _db_type, _pg_pool, _sqlite_conn
+    with _init_lock:
+        if _pg_pool is not None:
+            _pg_pool.closeall()
+            _pg_pool = None
+        if _sqlite_conn is not None:
+            with _sqlite_lock:
+                _sqlite_conn.close()
+            _sqlite_conn = None
+        _db_type = None
+
+def pool_status() -> dict:
+    """Backend and connection usage, read without touching the database."""
+    if _db_type == "postgres":
+        pool = _pg_pool
+        if pool is None or pool.closed:
+            return {'backend': "postgres", 'open': False}
+        return {'backend': "postgres", 'open': True, 'in_use': len(pool._used), 'idle': len(pool._pool), 'max': pool.maxconn}
+    return {'backend': _db_type, 'open': _sqlite_conn is not None}
+
+def ping():
+    """Round trip to the database."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute('SELECT 1')
+            cur.fetchone()
+        finally:
+            cur.close()
+
+def execute_values(cur, sql, rows):
+    """psycopg2's batched VALUES insert, imported on first use."""
+    from psycopg2.extras import execute_values as _execute_values
+    return _execute_values(cur, sql, rows)
 
 def dict_from_row(row, cursor):
-    # Get DB_TYPE at runtime
-    DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
-    if DB_TYPE == "postgres":
+    if get_db_type() == "postgres":
         return dict(row)
     else:
         return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
@@ -0,0 +1,146 @@
+# Materialized standings of tracked summoners behind /ranking
+import os
+import time
+from typing import List
+from utils.scoring import ParticipantBatch
+from .db import get_connection, get_db_type, execute_values
+from .rollups import _as_tuple
+
+# Players need this many games to appear in the winrate and KDA rankings
+LEADERBOARD_MIN_GAMES = int(os.getenv("LEADERBOARD_MIN_GAMES", "5"))
+
+# Weeks start on Monday 00:00 UTC (1970-01-05); game_creation is in milliseconds
+WEEK_MS = 7 * 24 * 3600 * 1000
+_FIRST_MONDAY_MS = 4 * 24 * 3600 * 1000
+
+# order -> (WHERE, ORDER BY); every pair is served by its own index
+LEADERBOARD_ORDERS = {
+    'winrate': ('games >= {p}', 'winrate DESC, games DESC'),
+    'kda': ('games >= {p}', 'kda DESC, games DESC'),
+    'semana': ('week_start = {p}', 'week_games DESC'),
+    'peor': ('worst_count > 0', 'worst_count DESC'),
+}
+
+_KDA_SQL = '({k} + {a}) * 1.0 / CASE WHEN {d} > 0 THEN {d} ELSE 1 END'
+
+def week_start(game_creation_ms: int) -> int:
+    """Start of the week (ms) that contains game_creation_ms"""
+    return (game_creation_ms - _FIRST_MONDAY_MS) // WEEK_MS * WEEK_MS + _FIRST_MONDAY_MS
+
+def _tracked(cur, db_type, riot_ids) -> set:
+    """Lowercased Riot IDs among riot_ids that someone has searched"""
+    if not riot_ids:
+        return set()
+    placeholder = "%s" if db_type == "postgres" else "?"
+    cur.execute(
+        f'SELECT lower(riot_id) FROM summoners WHERE lower(riot_id) IN ({", ".join(placeholder for _ in riot_ids)})',
+        [riot_id.lower() for riot_id in riot_ids]
+    )
+    return {_as_tuple(row)[0] for row in cur.fetchall()}
+
+def update_leaderboard(cur, db_type, match_data, rows):
+    """Add a newly stored match to the standings of the tracked players in it.
+
+    rows are the participant rows of match_data (matches.PARTICIPANT_COLUMNS order);
+    runs inside the caller's transaction.
+    """
+    tracked = _tracked(cur, db_type, [row[3] for row in rows if row[3]])
+    if not tracked:
+        return
+
+    # Same pick as /analizarpartida: lowest score of each team; remakes do not count
+    worst = set()
+    if not match_data['info'].get('gameEndedInEarlySurrender'):
+        worst = {int(i) for i in ParticipantBatch.from_matches([match_data]).worst_per_team()}
+
+    entries = []
+    for i, (_, puuid, _, riot_id, _, _, _, _, kills, deaths, assists,
+            *_, win, _, _, creation) in enumerate(rows):
+        if not riot_id or riot_id.lower() not in tracked:
+            continue
+        won = 1 if win else 0
+        entries.append((
+            puuid, riot_id, 1, won, kills, deaths, assists, won * 100.0, (kills + assists) / max(1, deaths),
+            1 if i in worst else 0, week_start(creation or 0), 1
+        ))
+    if not entries:
+        return
+
+    sql = f'''
+        INSERT INTO leaderboard (puuid, riot_id, games, wins, kills, deaths, assists, winrate, kda,
+                                 worst_count, week_start, week_games)
+        VALUES {{values}}
+        ON CONFLICT (puuid) DO UPDATE SET
+            riot_id = excluded.riot_id,
+            games = leaderboard.games + excluded.games,
+            wins = leaderboard.wins + excluded.wins,
+            kills = leaderboard.kills + excluded.kills,
+            deaths = leaderboard.deaths + excluded.deaths,
+            assists = leaderboard.assists + excluded.assists,
+            winrate = (leaderboard.wins + excluded.wins) * 100.0 / (leaderboard.games + excluded.games),
+            kda = {_KDA_SQL.format(
+                k='(leaderboard.kills + excluded.kills)',
+                a='(leaderboard.assists + excluded.assists)',
+                d='(leaderboard.deaths + excluded.deaths)'
+            )},
+            worst_count = leaderboard.worst_count + excluded.worst_count,
+            week_games = CASE
+                WHEN excluded.week_start > leaderboard.week_start THEN excluded.week_games
+                WHEN excluded.week_start = leaderboard.week_start THEN leaderboard.week_games + excluded.week_games
+                ELSE leaderboard.week_games END,
+            week_start = CASE WHEN excluded.week_start > leaderboard.week_start
+                              THEN excluded.week_start ELSE leaderboard.week_start END
+    '''
+    if db_type == "postgres":
+        execute_values(cur, sql.format(values='%s'), entries)
+    else:
+        cur.executemany(sql.format(values=f'({", ".join("?" for _ in entries[0])})'), entries)
+
+def seed_leaderboard(cur, db_type, riot_ids=None):
+    """Create standings for tracked players from their stored history (all tracked players by default).
+
+    Existing rows are left alone; worst counts start at zero and grow with new matches.
+    """
+    placeholder = "%s" if db_type == "postgres" else "?"
+    params = [week_start(int(time.time() * 1000))] * 2
+    tracked_sql = 'SELECT lower(riot_id) FROM summoners'
+    if riot_ids is not None:
+        if not riot_ids:
+            return
+        tracked_sql += f' WHERE riot_id IN ({", ".join(placeholder for _ in riot_ids)})'
+        params += list(riot_ids)
+    kda = _KDA_SQL.format(k='p.kills', a='p.assists', d='p.deaths')
+    cur.execute(f'''
+        INSERT INTO leaderboard (puuid, riot_id, games, wins, kills, deaths, assists, winrate, kda,
+                                 worst_count, week_start, week_games)
+        SELECT p.puuid, p.riot_id, p.games, p.wins, p.kills, p.deaths, p.assists,
+               p.wins * 100.0 / p.games, {kda}, 0, {placeholder},
+               (SELECT COUNT(*) FROM participants x WHERE x.puuid = p.puuid AND x.game_creation >= {placeholder})
+        FROM player_stats p
+        WHERE p.games > 0 AND lower(p.riot_id) IN ({tracked_sql})
+        ON CONFLICT (puuid) DO NOTHING
+    ''', params)
+
+def get_leaderboard(order: str = 'winrate', limit: int = 10) -> List[dict]:
+    """Top `limit` tracked players for one of LEADERBOARD_ORDERS"""
+    DB_TYPE = get_db_type()
+    placeholder = "%s" if DB_TYPE == "postgres" else "?"
+    where, order_by = LEADERBOARD_ORDERS[order]
+    params = []
+    if '{p}' in where:
+        params.append(week_start(int(time.time() * 1000)) if order == 'semana' else LEADERBOARD_MIN_GAMES)
+    params.append(limit)
+
+    columns = ('riot_id', 'games', 'wins', 'winrate', 'kda', 'worst_count', 'week_games')
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f'SELECT {", ".join(columns)} FROM leaderboard WHERE {where.format(p=placeholder)} '
+                f'ORDER BY {order_by} LIMIT {placeholder}',
+                params
+            )
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+    return [dict(zip(columns, _as_tuple(row))) for row in rows]
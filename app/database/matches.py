@@ -0,0 +1,150 @@
+# Normalized storage of every match the bot downloads
+import json
+from typing import Optional
+from .db import get_connection, get_db_type, execute_values
+from .profiles import update_player_aggregates
+from .leaderboard import update_leaderboard
+from utils.baselines import baselines, BASELINE_COLUMNS
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+CACHED_MATCHES_SQL = "UPDATE stats_counters SET value = value + 1 WHERE name = 'cached_matches'"
+
+PARTICIPANT_COLUMNS = (
+    'match_id', 'puuid', 'participant_id', 'riot_id', 'team_id', 'champion_id', 'champion_name',
+    'team_position', 'kills', 'deaths', 'assists', 'damage_to_champions', 'total_minions',
+    'neutral_minions', 'vision_score', 'gold_earned', 'champ_level', 'win', 'queue_id',
+    'game_duration', 'game_creation'
+)
+_BASELINE_INDEX = [PARTICIPANT_COLUMNS.index(column) for column in BASELINE_COLUMNS]
+
+def participant_rows(match_data: dict):
+    """Flatten a Riot match payload into participant rows (PARTICIPANT_COLUMNS order)"""
+    match_id = match_data['metadata']['matchId']
+    info = match_data['info']
+    rows = []
+    for p in info['participants']:
+        game_name, tag_line = p.get('riotIdGameName'), p.get('riotIdTagline')
+        rows.append((
+            match_id,
+            p['puuid'],
+            p.get('participantId'),
+            f"{game_name}#{tag_line}" if game_name and tag_line else None,
+            p.get('teamId'),
+            p.get('championId'),
+            p.get('championName'),
+            p.get('teamPosition') or None,
+            p.get('kills', 0),
+            p.get('deaths', 0),
+            p.get('assists', 0),
+            p.get('totalDamageDealtToChampions', 0),
+            p.get('totalMinionsKilled', 0),
+            p.get('neutralMinionsKilled', 0),
+            p.get('visionScore', 0),
+            p.get('goldEarned', 0),
+            p.get('champLevel', 0),
+            bool(p.get('win')),
+            info.get('queueId'),
+            info.get('gameDuration'),
+            info.get('gameCreation'),
+        ))
+    return rows
+
+def save_match(match_data: dict) -> bool:
+    """Store a match, its participants and their running aggregates. Returns True if the match was new"""
+    try:
+        match_id = match_data['metadata']['matchId']
+        info = match_data['info']
+        match_row = (
+            match_id,
+            info.get('platformId'),
+            info.get('queueId'),
+            info.get('gameMode'),
+            info.get('gameCreation'),
+            info.get('gameDuration'),
+            info.get('gameVersion'),
+            bool(info.get('gameEndedInEarlySurrender', False)),
+            json.dumps(match_data, separators=(',', ':')),
+        )
+        rows = participant_rows(match_data)
+        columns = ', '.join(PARTICIPANT_COLUMNS)
+
+        with get_connection() as conn:
+            if get_db_type() == "sqlite":
+                cursor = conn.execute('''
+                    INSERT INTO matches (match_id, platform_id, queue_id, game_mode, game_creation,
+                                         game_duration, game_version, early_surrender, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (match_id) DO NOTHING
+                ''', match_row)
+                if cursor.rowcount == 0:
+                    return False
+                placeholders = ', '.join('?' for _ in PARTICIPANT_COLUMNS)
+                conn.executemany(
+                    f'INSERT INTO participants ({columns}) VALUES ({placeholders}) ON CONFLICT DO NOTHING',
+                    rows
+                )
+                cur = conn.cursor()
+                update_player_aggregates(cur, "sqlite", rows)
+                update_leaderboard(cur, "sqlite", match_data, rows)
+                conn.execute(CACHED_MATCHES_SQL)
+            else:
+                with conn.cursor() as cur:
+                    cur.execute('''
+                        INSERT INTO matches (match_id, platform_id, queue_id, game_mode, game_creation,
+                                             game_duration, game_version, early_surrender, payload)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (match_id) DO NOTHING
+                    ''', match_row)
+                    if cur.rowcount == 0:
+                        return False
+                    execute_values(
+                        cur, f'INSERT INTO participants ({columns}) VALUES %s ON CONFLICT DO NOTHING', rows
+                    )
+                    update_player_aggregates(cur, "postgres", rows)
+                    update_leaderboard(cur, "postgres", match_data, rows)
+                    cur.execute(CACHED_MATCHES_SQL)
+        # Committed: the percentile baselines pick the match up on their next refresh
+        baselines.add_rows([tuple(row[i] for i in _BASELINE_INDEX) for row in rows])
+        return True
+    except Exception as e:
+        log.error("Error saving match", match_id=match_data.get('metadata', {}).get('matchId'), error=e)
+        return False
+
+def get_stored_match(match_id: str) -> Optional[dict]:
+    """Return the stored payload of a match, or None if it was never downloaded"""
+    try:
+        with get_connection() as conn:
+            if get_db_type() == "sqlite":
+                row = conn.execute('SELECT payload FROM matches WHERE match_id = ?', (match_id,)).fetchone()
+                payload = row[0] if row else None
+            else:
+                with conn.cursor() as cur:
+                    cur.execute('SELECT payload FROM matches WHERE match_id = %s', (match_id,))
+                    row = cur.fetchone()
+                    payload = row['payload'] if row else None
+        return json.loads(payload) if payload else None
+    except Exception as e:
+        log.error("Error reading stored match", match_id=match_id, error=e)
+        return None
+
+def load_baselines(chunk_size: int = 5000):
+    """Build the percentile baselines from every stored participant"""
+    try:
+        rows = []
+        with get_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(f'SELECT {", ".join(BASELINE_COLUMNS)} FROM participants')
+                while True:
+                    chunk = cur.fetchmany(chunk_size)
+                    if not chunk:
+                        break
+                    rows.extend(tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in chunk)
+            finally:
+                cur.close()
+        baselines.load(rows)
+        log.info("Percentile baselines built", participants=len(rows))
+    except Exception as e:
+        log.error("Error loading percentile baselines", error=e)
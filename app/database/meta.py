@@ -0,0 +1,27 @@
+# Key/value bot state kept across restarts
+from typing import Optional
+from .db import get_connection, get_db_type
+from .rollups import _as_tuple
+
+def get_meta(key: str) -> Optional[str]:
+    placeholder = "%s" if get_db_type() == "postgres" else "?"
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(f'SELECT value FROM bot_meta WHERE key = {placeholder}', (key,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+    return _as_tuple(row)[0] if row else None
+
+def set_meta(key: str, value: str):
+    placeholder = "%s" if get_db_type() == "postgres" else "?"
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(f'''
+                INSERT INTO bot_meta (key, value) VALUES ({placeholder}, {placeholder})
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+            ''', (key, value))
+        finally:
+            cur.close()
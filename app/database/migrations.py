@@ -0,0 +1,311 @@
+# Versioned schema migrations shared by SQLite and PostgreSQL
+import sqlite3
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+def _first(row):
+    """First column of a row from a tuple or a RealDictCursor."""
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+def _m001_create_summoners(cur, db_type):
+    """Base summoners table (matches the schema created before migrations existed)."""
+    id_column = "id SERIAL PRIMARY KEY" if db_type == "postgres" else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+    cur.execute(f'''
+        CREATE TABLE IF NOT EXISTS summoners (
+            {id_column},
+            riot_id TEXT UNIQUE NOT NULL,
+            game_name TEXT NOT NULL,
+            tag_line TEXT NOT NULL,
+            search_count INTEGER DEFAULT 1,
+            last_searched TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _m002_summoner_search_indexes(cur, db_type):
+    """Substring search on game_name and a covering index for the popularity order."""
+    if db_type == "postgres":
+        cur.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cur.execute('''
+            CREATE INDEX IF NOT EXISTS idx_summoners_game_name_trgm
+            ON summoners USING gin (game_name gin_trgm_ops)
+        ''')
+        cur.execute('''
+            CREATE INDEX IF NOT EXISTS idx_summoners_popularity
+            ON summoners (search_count DESC, last_searched DESC) INCLUDE (riot_id, game_name)
+        ''')
+        return
+
+    cur.execute('''
+        CREATE INDEX IF NOT EXISTS idx_summoners_popularity
+        ON summoners (search_count DESC, last_searched DESC, riot_id, game_name)
+    ''')
+    try:
+        cur.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS summoners_fts
+            USING fts5(game_name, content='summoners', content_rowid='id', tokenize='trigram')
+        ''')
+    except sqlite3.OperationalError as e:
+        # Older SQLite builds lack FTS5 or its trigram tokenizer; LIKE still works without it
+        log.warning("FTS5 trigram search unavailable, skipping summoners_fts", error=e)
+        return
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS summoners_fts_ai AFTER INSERT ON summoners BEGIN
+            INSERT INTO summoners_fts(rowid, game_name) VALUES (new.id, new.game_name);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS summoners_fts_ad AFTER DELETE ON summoners BEGIN
+            INSERT INTO summoners_fts(summoners_fts, rowid, game_name) VALUES ('delete', old.id, old.game_name);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS summoners_fts_au AFTER UPDATE OF game_name ON summoners BEGIN
+            INSERT INTO summoners_fts(summoners_fts, rowid, game_name) VALUES ('delete', old.id, old.game_name);
+            INSERT INTO summoners_fts(rowid, game_name) VALUES (new.id, new.game_name);
+        END
+    ''')
+    cur.execute("INSERT INTO summoners_fts(summoners_fts) VALUES ('rebuild')")
+
+def _m003_matches_and_participants(cur, db_type):
+    """Normalized match store: one row per match plus one row per participant."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS matches (
+            match_id TEXT PRIMARY KEY,
+            platform_id TEXT,
+            queue_id INTEGER,
+            game_mode TEXT,
+            game_creation BIGINT,
+            game_duration INTEGER,
+            game_version TEXT,
+            early_surrender BOOLEAN DEFAULT FALSE,
+            payload TEXT NOT NULL,
+            stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS participants (
+            match_id TEXT NOT NULL REFERENCES matches (match_id) ON DELETE CASCADE,
+            puuid TEXT NOT NULL,
+            participant_id INTEGER,
+            riot_id TEXT,
+            team_id INTEGER,
+            champion_id INTEGER,
+            champion_name TEXT,
+            team_position TEXT,
+            kills INTEGER DEFAULT 0,
+            deaths INTEGER DEFAULT 0,
+            assists INTEGER DEFAULT 0,
+            damage_to_champions INTEGER DEFAULT 0,
+            total_minions INTEGER DEFAULT 0,
+            neutral_minions INTEGER DEFAULT 0,
+            vision_score INTEGER DEFAULT 0,
+            gold_earned INTEGER DEFAULT 0,
+            champ_level INTEGER DEFAULT 0,
+            win BOOLEAN,
+            queue_id INTEGER,
+            game_duration INTEGER,
+            game_creation BIGINT,
+            PRIMARY KEY (match_id, puuid)
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_matches_creation ON matches (game_creation DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_participants_puuid_time ON participants (puuid, game_creation DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_participants_champion_time ON participants (champion_name, game_creation DESC)')
+
+def _m004_stats_rollups(cur, db_type):
+    """Rollups behind /dbstats: running counters, daily totals and hourly per-summoner buckets."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS daily_searches (
+            day DATE PRIMARY KEY,
+            searches BIGINT NOT NULL DEFAULT 0
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS summoner_search_buckets (
+            bucket_hour BIGINT NOT NULL,
+            riot_id TEXT NOT NULL,
+            searches INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket_hour, riot_id)
+        )
+    ''')
+    # Seed the counters from the data that already exists
+    cur.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'total_summoners', COUNT(*) FROM summoners
+        UNION ALL SELECT 'total_searches', COALESCE(SUM(search_count), 0) FROM summoners
+        UNION ALL SELECT 'cached_matches', COUNT(*) FROM matches
+        UNION ALL SELECT 'match_cache_hits', 0
+        UNION ALL SELECT 'match_cache_misses', 0
+    ''')
+
+def _m005_player_aggregates(cur, db_type):
+    """Running per-player totals (overall, per champion, per role) updated as matches are stored."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            puuid TEXT PRIMARY KEY,
+            riot_id TEXT,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            kills BIGINT NOT NULL DEFAULT 0,
+            deaths BIGINT NOT NULL DEFAULT 0,
+            assists BIGINT NOT NULL DEFAULT 0,
+            minions BIGINT NOT NULL DEFAULT 0,
+            duration_seconds BIGINT NOT NULL DEFAULT 0,
+            last_game_creation BIGINT NOT NULL DEFAULT 0
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS player_champion_stats (
+            puuid TEXT NOT NULL,
+            champion_name TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            kills BIGINT NOT NULL DEFAULT 0,
+            deaths BIGINT NOT NULL DEFAULT 0,
+            assists BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (puuid, champion_name)
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS player_role_stats (
+            puuid TEXT NOT NULL,
+            team_position TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (puuid, team_position)
+        )
+    ''')
+    # /perfil resolves "Name#TAG" to a puuid case-insensitively
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_player_stats_riot_id ON player_stats (lower(riot_id))')
+
+    # Backfill from the matches stored so far
+    wins = 'SUM(CASE WHEN win THEN 1 ELSE 0 END)'
+    cur.execute(f'''
+        INSERT INTO player_stats (puuid, riot_id, games, wins, kills, deaths, assists, minions,
+                                  duration_seconds, last_game_creation)
+        SELECT puuid, MAX(riot_id), COUNT(*), {wins}, SUM(kills), SUM(deaths), SUM(assists),
+               SUM(total_minions + neutral_minions), SUM(COALESCE(game_duration, 0)), MAX(COALESCE(game_creation, 0))
+        FROM participants GROUP BY puuid
+    ''')
+    cur.execute(f'''
+        INSERT INTO player_champion_stats (puuid, champion_name, games, wins, kills, deaths, assists)
+        SELECT puuid, champion_name, COUNT(*), {wins}, SUM(kills), SUM(deaths), SUM(assists)
+        FROM participants WHERE champion_name IS NOT NULL GROUP BY puuid, champion_name
+    ''')
+    cur.execute(f'''
+        INSERT INTO player_role_stats (puuid, team_position, games, wins)
+        SELECT puuid, COALESCE(team_position, 'NONE'), COUNT(*), {wins}
+        FROM participants GROUP BY puuid, COALESCE(team_position, 'NONE')
+    ''')
+
+def _m006_leaderboard(cur, db_type):
+    """Materialized /ranking standings for tracked summoners, one index per ordering."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            puuid TEXT PRIMARY KEY,
+            riot_id TEXT NOT NULL,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            kills BIGINT NOT NULL DEFAULT 0,
+            deaths BIGINT NOT NULL DEFAULT 0,
+            assists BIGINT NOT NULL DEFAULT 0,
+            winrate REAL NOT NULL DEFAULT 0,
+            kda REAL NOT NULL DEFAULT 0,
+            worst_count INTEGER NOT NULL DEFAULT 0,
+            week_start BIGINT NOT NULL DEFAULT 0,
+            week_games INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_winrate ON leaderboard (winrate DESC, games DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_kda ON leaderboard (kda DESC, games DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_week ON leaderboard (week_start, week_games DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_worst ON leaderboard (worst_count DESC)')
+    # Ingest checks whether a participant is tracked regardless of how the Riot ID was typed
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_summoners_riot_id_lower ON summoners (lower(riot_id))')
+
+    from .leaderboard import seed_leaderboard
+    seed_leaderboard(cur, db_type)
+
+def _m007_bot_meta(cur, db_type):
+    """Small key/value store for bot state that must survive restarts (e.g. the command tree hash)."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _m008_leaderboard_double_precision(cur, db_type):
+    """REAL is float4 on PostgreSQL: store winrate and kda as doubles, like SQLite does."""
+    if db_type != "postgres":
+        return
+    cur.execute('''
+        ALTER TABLE leaderboard
+            ALTER COLUMN winrate TYPE DOUBLE PRECISION,
+            ALTER COLUMN kda TYPE DOUBLE PRECISION
+    ''')
+
+# (version, name, function) in the order they must run; never renumber or edit applied entries
+MIGRATIONS = [
+    (1, "create_summoners", _m001_create_summoners),
+    (2, "summoner_search_indexes", _m002_summoner_search_indexes),
+    (3, "matches_and_participants", _m003_matches_and_participants),
+    (4, "stats_rollups", _m004_stats_rollups),
+    (5, "player_aggregates", _m005_player_aggregates),
+    (6, "leaderboard", _m006_leaderboard),
+    (7, "bot_meta", _m007_bot_meta),
+    (8, "leaderboard_double_precision", _m008_leaderboard_double_precision),
+]
+
+def apply_migrations(conn, db_type):
+    """Apply every migration newer than the recorded schema version. Returns the versions applied."""
+    cur = conn.cursor()
+    try:
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cur.execute('SELECT version FROM schema_migrations')
+        rows = cur.fetchall()
+        applied = {_first(row) for row in rows}
+
+        placeholder = "%s" if db_type == "postgres" else "?"
+        newly_applied = []
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(cur, db_type)
+            cur.execute(
+                f'INSERT INTO schema_migrations (version, name) VALUES ({placeholder}, {placeholder})',
+                (version, name)
+            )
+            conn.commit()
+            newly_applied.append(version)
+            log.info("Applied migration", version=f"{version:03d}", name=name)
+        return newly_applied
+    finally:
+        cur.close()
+
+def has_table(conn, db_type, table):
+    """Check whether a table (or virtual table) exists."""
+    cur = conn.cursor()
+    try:
+        if db_type == "postgres":
+            cur.execute('SELECT to_regclass(%s) AS oid', (table,))
+            return _first(cur.fetchone()) is not None
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,))
+        return cur.fetchone() is not None
+    finally:
+        cur.close()
@@ -0,0 +1,169 @@
+# Per-player aggregates behind /perfil
+from collections import Counter
+from typing import Optional
+from .db import get_connection, get_db_type, execute_values
+from .rollups import _as_tuple
+
+# Window sizes accepted by /perfil
+MIN_PROFILE_MATCHES = 20
+MAX_PROFILE_MATCHES = 100
+
+WINDOW_COLUMNS = (
+    'champion_name', 'team_position', 'kills', 'deaths', 'assists', 'total_minions',
+    'neutral_minions', 'game_duration', 'win'
+)
+
+def update_player_aggregates(cur, db_type, rows):
+    """Fold the participant rows of a newly stored match into the running totals.
+
+    rows are in matches.PARTICIPANT_COLUMNS order; runs inside the caller's transaction.
+    """
+    player_rows, champion_rows, role_rows = [], [], []
+    for (_, puuid, _, riot_id, _, _, champion_name, team_position, kills, deaths, assists,
+         _, minions, monsters, _, _, _, win, _, duration, creation) in rows:
+        won = 1 if win else 0
+        player_rows.append((puuid, riot_id, 1, won, kills, deaths, assists, minions + monsters,
+                            duration or 0, creation or 0))
+        if champion_name:
+            champion_rows.append((puuid, champion_name, 1, won, kills, deaths, assists))
+        role_rows.append((puuid, team_position or 'NONE', 1, won))
+
+    player_sql = '''
+        INSERT INTO player_stats (puuid, riot_id, games, wins, kills, deaths, assists, minions,
+                                  duration_seconds, last_game_creation)
+        VALUES {values}
+        ON CONFLICT (puuid) DO UPDATE SET
+            riot_id = CASE WHEN excluded.last_game_creation >= player_stats.last_game_creation
+                           THEN COALESCE(excluded.riot_id, player_stats.riot_id) ELSE player_stats.riot_id END,
+            games = player_stats.games + excluded.games,
+            wins = player_stats.wins + excluded.wins,
+            kills = player_stats.kills + excluded.kills,
+            deaths = player_stats.deaths + excluded.deaths,
+            assists = player_stats.assists + excluded.assists,
+            minions = player_stats.minions + excluded.minions,
+            duration_seconds = player_stats.duration_seconds + excluded.duration_seconds,
+            last_game_creation = CASE WHEN excluded.last_game_creation > player_stats.last_game_creation
+                                      THEN excluded.last_game_creation ELSE player_stats.last_game_creation END
+    '''
+    champion_sql = '''
+        INSERT INTO player_champion_stats (puuid, champion_name, games, wins, kills, deaths, assists)
+        VALUES {values}
+        ON CONFLICT (puuid, champion_name) DO UPDATE SET
+            games = player_champion_stats.games + excluded.games,
+            wins = player_champion_stats.wins + excluded.wins,
+            kills = player_champion_stats.kills + excluded.kills,
+            deaths = player_champion_stats.deaths + excluded.deaths,
+            assists = player_champion_stats.assists + excluded.assists
+    '''
+    role_sql = '''
+        INSERT INTO player_role_stats (puuid, team_position, games, wins)
+        VALUES {values}
+        ON CONFLICT (puuid, team_position) DO UPDATE SET
+            games = player_role_stats.games + excluded.games,
+            wins = player_role_stats.wins + excluded.wins
+    '''
+    for sql, batch in ((player_sql, player_rows), (champion_sql, champion_rows), (role_sql, role_rows)):
+        if not batch:
+            continue
+        if db_type == "postgres":
+            execute_values(cur, sql.format(values='%s'), batch)
+        else:
+            placeholders = ', '.join('?' for _ in batch[0])
+            cur.executemany(sql.format(values=f'({placeholders})'), batch)
+
+def find_puuid(riot_id: str) -> Optional[str]:
+    """puuid of a Riot ID seen in any stored match, or None"""
+    placeholder = "%s" if get_db_type() == "postgres" else "?"
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f'SELECT puuid FROM player_stats WHERE lower(riot_id) = lower({placeholder}) '
+                f'ORDER BY last_game_creation DESC LIMIT 1',
+                (riot_id,)
+            )
+            row = cur.fetchone()
+        finally:
+            cur.close()
+    return _as_tuple(row)[0] if row else None
+
+def get_stored_match_ids(match_ids) -> set:
+    """Which of match_ids are already in the match store"""
+    if not match_ids:
+        return set()
+    placeholder = "%s" if get_db_type() == "postgres" else "?"
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f'SELECT match_id FROM matches WHERE match_id IN ({", ".join(placeholder for _ in match_ids)})',
+                list(match_ids)
+            )
+            return {_as_tuple(row)[0] for row in cur.fetchall()}
+        finally:
+            cur.close()
+
+def _summarize(games, wins, kills, deaths, assists):
+    return {
+        'games': games,
+        'wins': wins,
+        'winrate': wins / games * 100 if games else 0.0,
+        'kills': kills / games if games else 0.0,
+        'deaths': deaths / games if games else 0.0,
+        'assists': assists / games if games else 0.0,
+        'kda': (kills + assists) / max(1, deaths),
+    }
+
+def get_player_profile(puuid: str, matches: int = MIN_PROFILE_MATCHES) -> Optional[dict]:
+    """Profile over the last `matches` stored games plus the all-time running totals.
+
+    The window is an index range scan on (puuid, game_creation), so its cost does not
+    grow with the player's history. Returns None if the player has no stored games.
+    """
+    matches = max(MIN_PROFILE_MATCHES, min(MAX_PROFILE_MATCHES, matches))
+    placeholder = "%s" if get_db_type() == "postgres" else "?"
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                f'SELECT riot_id, games, wins, kills, deaths, assists FROM player_stats WHERE puuid = {placeholder}',
+                (puuid,)
+            )
+            totals = cur.fetchone()
+            if totals is None:
+                return None
+            cur.execute(
+                f'SELECT {", ".join(WINDOW_COLUMNS)} FROM participants WHERE puuid = {placeholder} '
+                f'ORDER BY game_creation DESC LIMIT {placeholder}',
+                (puuid, matches)
+            )
+            window = [_as_tuple(row) for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+    riot_id, *lifetime = _as_tuple(totals)
+    games = len(window)
+    wins = sum(1 for row in window if row[8])
+    champions, champion_wins, roles = Counter(), Counter(), Counter()
+    kills = deaths = assists = cs = seconds = 0
+    for champion, position, k, d, a, minions, monsters, duration, win in window:
+        kills, deaths, assists = kills + k, deaths + d, assists + a
+        cs += minions + monsters
+        seconds += duration or 0
+        champions[champion] += 1
+        champion_wins[champion] += 1 if win else 0
+        roles[position or 'NONE'] += 1
+
+    recent = _summarize(games, wins, kills, deaths, assists)
+    recent['cs_per_min'] = cs / (seconds / 60) if seconds else 0.0
+    recent['champions'] = [
+        (champion, n, champion_wins[champion] / n * 100) for champion, n in champions.most_common(5)
+    ]
+    recent['roles'] = [(role, n / games * 100) for role, n in roles.most_common()]
+    return {
+        'puuid': puuid,
+        'riot_id': riot_id,
+        'requested': matches,
+        'recent': recent,
+        'lifetime': _summarize(*lifetime),
+    }
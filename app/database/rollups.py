@@ -0,0 +1,140 @@
+# Incrementally maintained statistics read by /dbstats
+import threading
+import time
+from datetime import datetime, timezone
+from .db import get_connection, get_db_type, execute_values
+
+# Hourly per-summoner buckets are kept for the longest window shown (7 days)
+BUCKET_RETENTION_HOURS = 7 * 24
+_last_prune_hour = 0
+
+# Counter deltas (cache hits, etc.) buffered until the next search flush
+_pending_counters = {}
+_counters_lock = threading.Lock()
+
+def _as_tuple(row):
+    return tuple(row.values()) if isinstance(row, dict) else tuple(row)
+
+def increment_counter(name: str, amount: int = 1):
+    """Add to a stats counter; written to the database by the next flush"""
+    with _counters_lock:
+        _pending_counters[name] = _pending_counters.get(name, 0) + amount
+
+def take_pending_counters() -> dict:
+    """Swap out the buffered counter deltas"""
+    global _pending_counters
+    with _counters_lock:
+        counters, _pending_counters = _pending_counters, {}
+    return counters
+
+def requeue_counters(counters: dict):
+    for name, amount in counters.items():
+        increment_counter(name, amount)
+
+def count_new_summoners(cur, db_type, riot_ids) -> int:
+    """How many of riot_ids are not in the summoners table yet"""
+    placeholder = "%s" if db_type == "postgres" else "?"
+    existing = 0
+    for start in range(0, len(riot_ids), 500):
+        chunk = riot_ids[start:start + 500]
+        cur.execute(
+            f'SELECT COUNT(*) AS n FROM summoners WHERE riot_id IN ({", ".join(placeholder for _ in chunk)})',
+            chunk
+        )
+        existing += _as_tuple(cur.fetchone())[0]
+    return len(riot_ids) - existing
+
+def _add_counters(cur, db_type, counters):
+    rows = [(name, amount) for name, amount in counters.items() if amount]
+    if not rows:
+        return
+    sql = '''
+        INSERT INTO stats_counters (name, value) VALUES {values}
+        ON CONFLICT (name) DO UPDATE SET value = stats_counters.value + excluded.value
+    '''
+    if db_type == "postgres":
+        execute_values(cur, sql.format(values='%s'), rows)
+    else:
+        cur.executemany(sql.format(values='(?, ?)'), rows)
+
+def apply_search_rollups(cur, db_type, search_rows, new_summoners, counters):
+    """Fold a flushed batch into the rollup tables, inside the caller's transaction.
+
+    search_rows are (riot_id, searches, last_searched epoch) tuples.
+    """
+    global _last_prune_hour
+    counters = dict(counters)
+    if search_rows:
+        counters['total_searches'] = counters.get('total_searches', 0) + sum(r[1] for r in search_rows)
+        counters['total_summoners'] = counters.get('total_summoners', 0) + new_summoners
+    _add_counters(cur, db_type, counters)
+    if not search_rows:
+        return
+
+    daily, buckets = {}, {}
+    for riot_id, searches, last_searched in search_rows:
+        day = datetime.fromtimestamp(last_searched, timezone.utc).strftime('%Y-%m-%d')
+        daily[day] = daily.get(day, 0) + searches
+        key = (int(last_searched // 3600), riot_id)
+        buckets[key] = buckets.get(key, 0) + searches
+
+    daily_sql = '''
+        INSERT INTO daily_searches (day, searches) VALUES {values}
+        ON CONFLICT (day) DO UPDATE SET searches = daily_searches.searches + excluded.searches
+    '''
+    bucket_sql = '''
+        INSERT INTO summoner_search_buckets (bucket_hour, riot_id, searches) VALUES {values}
+        ON CONFLICT (bucket_hour, riot_id) DO UPDATE
+        SET searches = summoner_search_buckets.searches + excluded.searches
+    '''
+    bucket_rows = [(hour, riot_id, n) for (hour, riot_id), n in buckets.items()]
+    if db_type == "postgres":
+        execute_values(cur, daily_sql.format(values='%s'), list(daily.items()))
+        execute_values(cur, bucket_sql.format(values='%s'), bucket_rows)
+    else:
+        cur.executemany(daily_sql.format(values='(?, ?)'), list(daily.items()))
+        cur.executemany(bucket_sql.format(values='(?, ?, ?)'), bucket_rows)
+
+    # Drop buckets that fell out of the 7 day window, at most once per hour
+    current_hour = int(time.time() // 3600)
+    if current_hour != _last_prune_hour:
+        placeholder = "%s" if db_type == "postgres" else "?"
+        cur.execute(
+            f'DELETE FROM summoner_search_buckets WHERE bucket_hour < {placeholder}',
+            (current_hour - BUCKET_RETENTION_HOURS,)
+        )
+        _last_prune_hour = current_hour
+
+def get_rollup_stats(top: int = 5) -> dict:
+    """Read the precomputed totals, daily series and top searched players"""
+    DB_TYPE = get_db_type()
+    placeholder = "%s" if DB_TYPE == "postgres" else "?"
+    current_hour = int(time.time() // 3600)
+    top_sql = f'''
+        SELECT riot_id, SUM(searches) AS searches FROM summoner_search_buckets
+        WHERE bucket_hour > {placeholder}
+        GROUP BY riot_id ORDER BY searches DESC LIMIT {placeholder}
+    '''
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute('SELECT name, value FROM stats_counters')
+            counters = {name: int(value) for name, value in map(_as_tuple, cur.fetchall())}
+            cur.execute('SELECT day, searches FROM daily_searches ORDER BY day DESC LIMIT 7')
+            daily = [(str(day), int(searches)) for day, searches in map(_as_tuple, cur.fetchall())]
+            cur.execute(top_sql, (current_hour - 24, top))
+            top_24h = [(riot_id, int(n)) for riot_id, n in map(_as_tuple, cur.fetchall())]
+            cur.execute(top_sql, (current_hour - BUCKET_RETENTION_HOURS, top))
+            top_7d = [(riot_id, int(n)) for riot_id, n in map(_as_tuple, cur.fetchall())]
+        finally:
+            cur.close()
+
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    return {
+        'counters': counters,
+        'searches_today': next((n for day, n in daily if day == today), 0),
+        'daily_searches': daily,
+        'top_24h': top_24h,
+        'top_7d': top_7d,
+    }
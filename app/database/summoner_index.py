@@ -0,0 +1,115 @@
+# In-memory index of summoners used to answer autocomplete without querying the database
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List
+
+def _to_timestamp(value) -> float:
+    """Normalize last_searched (datetime, SQLite text or None) to a UTC epoch."""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SummonerIndex:
+    """Substring index over game names, ranked like the SQL query.
+
+    Ranking matches ``ORDER BY search_count DESC, last_searched DESC``.
+    Queries of three or more characters go through a trigram posting list.
+    Shorter ones walk the ranked list and stop after ``limit`` matches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}                 # riot_id -> [game_name_lower, search_count, last_searched]
+        self._ranked = []                  # sorted (-search_count, -last_searched, riot_id)
+        self._postings = defaultdict(set)  # trigram -> riot_ids
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, riot_id):
+        return riot_id in self._entries
+
+    @staticmethod
+    def _rank_key(riot_id, entry):
+        return (-entry[1], -entry[2], riot_id)
+
+    def _add(self, riot_id, game_name, search_count, last_searched):
+        entry = [game_name.lower(), search_count, last_searched]
+        self._entries[riot_id] = entry
+        insort(self._ranked, self._rank_key(riot_id, entry))
+        for gram in _trigrams(entry[0]):
+            self._postings[gram].add(riot_id)
+
+    def load(self, rows):
+        """Replace the index contents with (riot_id, game_name, search_count, last_searched) rows."""
+        with self._lock:
+            self._entries.clear()
+            self._ranked.clear()
+            self._postings.clear()
+            for riot_id, game_name, search_count, last_searched in rows:
+                self._add(riot_id, game_name, int(search_count or 0), _to_timestamp(last_searched))
+            self.loaded = True
+
+    def record_search(self, riot_id: str, game_name: str, count: int = 1, when: float = None):
+        """Apply ``count`` new searches of ``riot_id`` (inserting it if unknown)."""
+        when = time.time() if when is None else when
+        with self._lock:
+            entry = self._entries.get(riot_id)
+            if entry is None:
+                self._add(riot_id, game_name, count, when)
+                return
+            old_key = self._rank_key(riot_id, entry)
+            del self._ranked[bisect_left(self._ranked, old_key)]
+            entry[1] += count
+            entry[2] = max(entry[2], when)
+            insort(self._ranked, self._rank_key(riot_id, entry))
+
+    def search(self, query: str = "", limit: int = 10) -> List[str]:
+        """Return up to ``limit`` riot_ids whose game name contains ``query``."""
+        needle = (query or "").strip().lower()
+        with self._lock:
+            if not needle:
+                return [key[2] for key in self._ranked[:limit]]
+
+            if len(needle) < 3:
+                results = []
+                for key in self._ranked:
+                    if needle in self._entries[key[2]][0]:
+                        results.append(key[2])
+                        if len(results) >= limit:
+                            break
+                return results
+
+            postings = sorted((self._postings.get(gram, ()) for gram in _trigrams(needle)), key=len)
+            if not postings[0]:
+                return []
+            candidates = set(postings[0]).intersection(*postings[1:])
+            matches = (
+                self._rank_key(riot_id, self._entries[riot_id])
+                for riot_id in candidates
+                if needle in self._entries[riot_id][0]
+            )
+            return [key[2] for key in heapq.nsmallest(limit, matches)]
+
+    def top(self, limit: int = 10) -> List[str]:
+        """Most searched summoners, same as an empty query."""
+        return self.search("", limit)
+
+summoner_index = SummonerIndex()
@@ -1,102 +1,166 @@
+import atexit
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from typing import List, Optional
-from .db import get_connection
+from .db import get_connection, get_db_type, execute_values, pool_status
+from .summoner_index import summoner_index
+from .migrations import apply_migrations, has_table
+from .rollups import count_new_summoners, apply_search_rollups, take_pending_counters, requeue_counters, get_rollup_stats
+from .leaderboard import seed_leaderboard
+from utils.log import get_logger
+
+log = get_logger(__name__)
 
 # Database file path (sqlite fallback)
 DB_PATH = os.path.join(os.path.dirname(__file__), 'summoners.db')
 
+# Set by init_database() when the SQLite trigram table (summoners_fts) exists
+_has_fts = False
+# Popular summoners scanned with LIKE before an autocomplete query falls back to summoners_fts
+AUTOCOMPLETE_SCAN_ROWS = int(os.getenv("AUTOCOMPLETE_SCAN_ROWS", "5000"))
+
+# Write-behind buffer: riot_id -> [game_name, tag_line, pending searches, last search epoch]
+SEARCH_FLUSH_INTERVAL = float(os.getenv("SEARCH_FLUSH_INTERVAL", "5"))
+_pending_searches = {}
+_pending_lock = threading.Lock()
+
 def init_database():
-    """Initialize the summoners database"""
-    DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
-    if DB_TYPE == "sqlite":
-        import sqlite3
-        with get_connection() as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS summoners (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    riot_id TEXT UNIQUE NOT NULL,
-                    game_name TEXT NOT NULL,
-                    tag_line TEXT NOT NULL,
-                    search_count INTEGER DEFAULT 1,
-                    last_searched TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            conn.commit()
-    elif DB_TYPE == "postgres":
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute('''
-                    CREATE TABLE IF NOT EXISTS summoners (
-                        id SERIAL PRIMARY KEY,
-                        riot_id TEXT UNIQUE NOT NULL,
-                        game_name TEXT NOT NULL,
-                        tag_line TEXT NOT NULL,
-                        search_count INTEGER DEFAULT 1,
-                        last_searched TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                conn.commit()
+    """Connect and bring the schema up to date; entry points call this once before any query"""
+    global _has_fts
+    DB_TYPE = get_db_type()
+    with get_connection() as conn:
+        apply_migrations(conn, DB_TYPE)
+        _has_fts = DB_TYPE == "sqlite" and has_table(conn, DB_TYPE, "summoners_fts")
 
 def save_summoner(riot_id: str):
-    """Save or update a summoner search"""
+    """Record a summoner search; it is written to the database by the next flush"""
     try:
         # Parse riot_id to get game_name and tag_line
         if '#' not in riot_id:
             return
         
         game_name, tag_line = riot_id.split('#', 1)
+        now = time.time()
         
-        DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
+        with _pending_lock:
+            pending = _pending_searches.get(riot_id)
+            if pending:
+                pending[2] += 1
+                pending[3] = now
+            else:
+                _pending_searches[riot_id] = [game_name, tag_line, 1, now]
+
+        # The autocomplete ranking sees the search right away
+        summoner_index.record_search(riot_id, game_name, when=now)
+    except Exception as e:
+        log.error("Error saving summoner", riot_id=riot_id, error=e)
+
+def _requeue_searches(batch):
+    """Merge a batch that failed to flush back into the pending buffer"""
+    with _pending_lock:
+        for riot_id, (game_name, tag_line, count, last_searched) in batch.items():
+            pending = _pending_searches.get(riot_id)
+            if pending:
+                pending[2] += count
+                pending[3] = max(pending[3], last_searched)
+            else:
+                _pending_searches[riot_id] = [game_name, tag_line, count, last_searched]
+
+def flush_pending_searches() -> int:
+    """Write buffered searches (and their rollups) in one transaction. Returns the number of summoners written"""
+    global _pending_searches
+    with _pending_lock:
+        batch, _pending_searches = _pending_searches, {}
+    counters = take_pending_counters()
+    if not batch and not counters:
+        return 0
+
+    rows = [
+        (riot_id, game_name, tag_line, count,
+         datetime.fromtimestamp(last_searched, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        for riot_id, (game_name, tag_line, count, last_searched) in batch.items()
+    ]
+    try:
+        DB_TYPE = get_db_type()
         with get_connection() as conn:
+            cur = conn.cursor()
+            new_summoners = count_new_summoners(cur, DB_TYPE, list(batch))
             if DB_TYPE == "sqlite":
-                # Try to update existing record
-                cursor = conn.execute('''
-                    UPDATE summoners 
-                    SET search_count = search_count + 1, last_searched = CURRENT_TIMESTAMP
-                    WHERE riot_id = ?
-                ''', (riot_id,))
-                
-                # If no record was updated, insert new one
-                if cursor.rowcount == 0:
-                    conn.execute('''
-                        INSERT INTO summoners (riot_id, game_name, tag_line)
-                        VALUES (?, ?, ?)
-                    ''', (riot_id, game_name, tag_line))
-                
-                conn.commit()
+                cur.executemany('''
+                    INSERT INTO summoners (riot_id, game_name, tag_line, search_count, last_searched)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (riot_id) DO UPDATE SET
+                        search_count = summoners.search_count + excluded.search_count,
+                        last_searched = excluded.last_searched
+                ''', rows)
+            elif rows:
+                execute_values(cur, '''
+                    INSERT INTO summoners (riot_id, game_name, tag_line, search_count, last_searched)
+                    VALUES %s
+                    ON CONFLICT (riot_id) DO UPDATE SET
+                        search_count = summoners.search_count + EXCLUDED.search_count,
+                        last_searched = EXCLUDED.last_searched
+                ''', rows)
+            search_rows = [(riot_id, count, last) for riot_id, (_, _, count, last) in batch.items()]
+            apply_search_rollups(cur, DB_TYPE, search_rows, new_summoners, counters)
+            if new_summoners:
+                # Newly tracked players join /ranking with the history already stored
+                seed_leaderboard(cur, DB_TYPE, list(batch))
+            cur.close()
+        return len(rows)
+    except Exception as e:
+        log.error("Error flushing summoner searches", summoners=len(rows), error=e)
+        _requeue_searches(batch)
+        requeue_counters(counters)
+        return 0
+
+def load_summoner_index():
+    """Load every summoner into the in-memory autocomplete index"""
+    try:
+        with get_connection() as conn:
+            if get_db_type() == "sqlite":
+                rows = conn.execute('SELECT riot_id, game_name, search_count, last_searched FROM summoners').fetchall()
             else:
                 with conn.cursor() as cur:
-                    # Try to update existing record
-                    cur.execute('''
-                        UPDATE summoners 
-                        SET search_count = search_count + 1, last_searched = CURRENT_TIMESTAMP
-                        WHERE riot_id = %s
-                    ''', (riot_id,))
-                    
-                    # If no record was updated, insert new one
-                    if cur.rowcount == 0:
-                        cur.execute('''
-                            INSERT INTO summoners (riot_id, game_name, tag_line)
-                            VALUES (%s, %s, %s)
-                        ''', (riot_id, game_name, tag_line))
-                    conn.commit()
+                    cur.execute('SELECT riot_id, game_name, search_count, last_searched FROM summoners')
+                    rows = [(r['riot_id'], r['game_name'], r['search_count'], r['last_searched']) for r in cur.fetchall()]
+        summoner_index.load(rows)
+        log.info("Autocomplete index loaded", summoners=len(summoner_index))
     except Exception as e:
-        print(f"Error saving summoner {riot_id}: {e}")
+        log.error("Error loading summoner index", error=e)
 
 def get_summoners_for_autocomplete(query: str = "", limit: int = 10) -> List[str]:
     """Get summoners for autocomplete, ordered by search frequency and recency"""
     try:
-        DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
-        print(f"[DEBUG] get_summoners_for_autocomplete - DB_TYPE: {DB_TYPE}, query: '{query}', limit: {limit}")
-        
+        DB_TYPE = get_db_type()
+        log.debug("Autocomplete query", sample=True, db_type=DB_TYPE, query=query, limit=limit)
+
         with get_connection() as conn:
-            print(f"[DEBUG] get_summoners_for_autocomplete - Connection obtained: {type(conn)}")
-            
             if DB_TYPE == "sqlite":
-                if query:
+                if query and _has_fts and len(query) >= 3:
+                    # Walk the covering popularity index like the LIKE branch, but only over the
+                    # most popular summoners: common substrings fill the page within a few rows
+                    results = [row[0] for row in conn.execute('''
+                        SELECT riot_id FROM (
+                            SELECT riot_id, game_name FROM summoners
+                            ORDER BY search_count DESC, last_searched DESC
+                            LIMIT ?
+                        )
+                        WHERE game_name LIKE ?
+                        LIMIT ?
+                    ''', (AUTOCOMPLETE_SCAN_ROWS, f'%{query}%', limit)).fetchall()]
+                    if len(results) == limit:
+                        return results
+                    # Rare substring: the trigram index finds its few matches without a full scan
+                    cursor = conn.execute('''
+                        SELECT riot_id FROM summoners 
+                        WHERE id IN (SELECT rowid FROM summoners_fts WHERE game_name LIKE ?)
+                        ORDER BY search_count DESC, last_searched DESC 
+                        LIMIT ?
+                    ''', (f'%{query}%', limit))
+                elif query:
                     # Search by game_name (case insensitive)
                     cursor = conn.execute('''
                         SELECT riot_id FROM summoners 
@@ -113,12 +177,10 @@ def get_summoners_for_autocomplete(query: str = "", limit: int = 10) -> List[str
                     ''', (limit,))
                 
                 results = [row[0] for row in cursor.fetchall()]
-                print(f"[DEBUG] get_summoners_for_autocomplete - SQLite results: {results}")
                 return results
             else:
                 with conn.cursor() as cur:
                     if query:
-                        print(f"[DEBUG] get_summoners_for_autocomplete - Executing PostgreSQL query with search")
                         cur.execute('''
                             SELECT riot_id FROM summoners 
                             WHERE game_name ILIKE %s 
@@ -126,7 +188,6 @@ def get_summoners_for_autocomplete(query: str = "", limit: int = 10) -> List[str
                             LIMIT %s
                         ''', (f'%{query}%', limit))
                     else:
-                        print(f"[DEBUG] get_summoners_for_autocomplete - Executing PostgreSQL query without search")
                         cur.execute('''
                             SELECT riot_id FROM summoners 
                             ORDER BY search_count DESC, last_searched DESC 
@@ -135,59 +196,34 @@ def get_summoners_for_autocomplete(query: str = "", limit: int = 10) -> List[str
                     
                     # With RealDictCursor, results are dictionaries, not tuples
                     results = [row['riot_id'] for row in cur.fetchall()]
-                    print(f"[DEBUG] get_summoners_for_autocomplete - PostgreSQL results: {results}")
                     return results
     except Exception as e:
-        print(f"Error getting summoners for autocomplete: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error getting summoners for autocomplete", query=query)
         return []
 
 def get_summoner_stats() -> dict:
-    """Get database statistics"""
+    """Get database statistics from the incrementally maintained rollups"""
     try:
-        DB_TYPE = os.getenv("DB_TYPE", "sqlite").lower()
-        print(f"[DEBUG] get_summoner_stats - DB_TYPE: {DB_TYPE}")
-        
-        with get_connection() as conn:
-            print(f"[DEBUG] get_summoner_stats - Connection obtained: {type(conn)}")
-            
-            if DB_TYPE == "sqlite":
-                cursor = conn.execute('SELECT COUNT(*), SUM(search_count) FROM summoners')
-                result = cursor.fetchone()
-                print(f"[DEBUG] get_summoner_stats - SQLite result: {result}")
-                total_summoners, total_searches = result
-            else:
-                with conn.cursor() as cur:
-                    cur.execute('SELECT COUNT(*), SUM(search_count) FROM summoners')
-                    result = cur.fetchone()
-                    print(f"[DEBUG] get_summoner_stats - PostgreSQL result: {result}")
-                    # With RealDictCursor, results are dictionaries, not tuples
-                    total_summoners, total_searches = result['count'], result['sum']
-            
-            print(f"[DEBUG] get_summoner_stats - Raw values: summoners={total_summoners}, searches={total_searches}")
-            
-            # Forzar a int para evitar errores si vienen como str
-            try:
-                total_summoners = int(total_summoners or 0)
-            except Exception:
-                total_summoners = 0
-            try:
-                total_searches = int(total_searches or 0)
-            except Exception:
-                total_searches = 0
-            
-            print(f"[DEBUG] get_summoner_stats - Final values: summoners={total_summoners}, searches={total_searches}")
-            
-            return {
-                'total_summoners': total_summoners,
-                'total_searches': total_searches
-            }
+        rollups = get_rollup_stats()
+        counters = rollups['counters']
+        return {
+            'total_summoners': counters.get('total_summoners', 0),
+            'total_searches': counters.get('total_searches', 0),
+            'cached_matches': counters.get('cached_matches', 0),
+            'match_cache_hits': counters.get('match_cache_hits', 0),
+            'match_cache_misses': counters.get('match_cache_misses', 0),
+            'searches_today': rollups['searches_today'],
+            'daily_searches': rollups['daily_searches'],
+            'top_24h': rollups['top_24h'],
+            'top_7d': rollups['top_7d'],
+        }
     except Exception as e:
-        print(f"Error getting summoner stats: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error getting summoner stats")
         return {'total_summoners': 0, 'total_searches': 0}
 
-# Initialize database when module is imported
-init_database()
+def _flush_at_exit():
+    """Last-chance flush for scripts; once the pool is closed (the bot flushed in close()) it would reopen it"""
+    if pool_status()['open']:
+        flush_pending_searches()
+
+atexit.register(_flush_at_exit)
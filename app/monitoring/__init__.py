@@ -0,0 +1,4 @@
+# Monitoring module; the HTTP server (monitoring.server) is imported by the bot alone,
+# since its health checks depend on modules that themselves record metrics
+from .metrics import registry
+from .loop_monitor import loop_monitor
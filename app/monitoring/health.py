@@ -0,0 +1,71 @@
+# Health and readiness checks behind /health and /ready (used by the Docker HEALTHCHECK)
+import asyncio
+import math
+import os
+import time
+from database import run_db
+from database.db import pool_status, ping
+from riot.active_game_notify import notifier_status, CHECK_INTERVAL
+from .loop_monitor import loop_monitor
+
+HEALTH_MAX_LOOP_LAG = float(os.getenv("HEALTH_MAX_LOOP_LAG", "5"))
+HEALTH_MAX_WS_LATENCY = float(os.getenv("HEALTH_MAX_WS_LATENCY", "10"))
+# A notifier cycle sleeps CHECK_INTERVAL and then walks every tracked player; allow a few slow ones
+HEALTH_MAX_NOTIFIER_AGE = float(os.getenv("HEALTH_MAX_NOTIFIER_AGE", str(CHECK_INTERVAL * 4)))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "3"))
+
+def _gateway(bot) -> dict:
+    connected = (
+        bot is not None and bot.is_ready() and not bot.is_closed()
+        and bot.ws is not None and bot.ws.open
+    )
+    return {'ok': connected}
+
+def _websocket(bot) -> dict:
+    latency = bot.latency if bot is not None else math.inf
+    if not math.isfinite(latency):
+        return {'ok': False, 'latency_s': None}
+    return {'ok': latency <= HEALTH_MAX_WS_LATENCY, 'latency_s': round(latency, 3)}
+
+def _event_loop() -> dict:
+    # A fully blocked loop cannot answer at all; the HEALTHCHECK timeout covers that case
+    return {
+        'ok': loop_monitor.running and loop_monitor.lag <= HEALTH_MAX_LOOP_LAG,
+        'lag_s': round(loop_monitor.lag, 4),
+    }
+
+def _notifier() -> dict:
+    if notifier_status['started'] is None:
+        # Not configured (no NOTIFY_CHANNEL_ID / NOTIFY_USER_ID) or not started yet
+        return {'ok': True, 'running': False}
+    last_cycle = notifier_status['last_cycle']
+    age = time.time() - (last_cycle or notifier_status['started'])
+    return {
+        'ok': age <= HEALTH_MAX_NOTIFIER_AGE,
+        'running': True,
+        'last_cycle_age_s': round(age) if last_cycle else None,
+    }
+
+async def _database() -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(run_db(ping), HEALTH_DB_TIMEOUT)
+    except Exception as e:
+        return {**pool_status(), 'ok': False, 'error': str(e) or type(e).__name__}
+    return {**pool_status(), 'ok': True, 'ping_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+async def health_report(bot) -> tuple:
+    """(healthy, checks): every check reports 'ok' plus what it measured."""
+    checks = {
+        'gateway': _gateway(bot),
+        'websocket': _websocket(bot),
+        'event_loop': _event_loop(),
+        'notifier': _notifier(),
+        'database': await _database(),
+    }
+    return all(check['ok'] for check in checks.values()), checks
+
+async def readiness_report(bot) -> tuple:
+    """(ready, checks): connected to Discord with a working database."""
+    checks = {'gateway': _gateway(bot), 'database': await _database()}
+    return all(check['ok'] for check in checks.values()), checks
@@ -0,0 +1,108 @@
+# Measures how late the event loop runs a periodic wake-up (time other callbacks blocked it)
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from utils.log import get_logger
+from .metrics import LOOP_LAG_SECONDS, LOOP_LAG_CURRENT, LOOP_BLOCKED
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+# Lag above this is counted and logged (sampled) even outside debug mode
+LOOP_LAG_WARN = float(os.getenv("LOOP_LAG_WARN", "0.25"))
+# Debug mode: asyncio debug, slow callback warnings and a watchdog thread that captures
+# the loop thread's stack whenever a callback holds the loop longer than LOOP_BLOCK_THRESHOLD
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "0") == "1"
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))
+
+log = get_logger(__name__)
+
+# (unix time, seconds blocked when captured, stack) of the latest blocking callbacks seen by the watchdog
+blocked_stacks = collections.deque(maxlen=20)
+
+class _Watchdog(threading.Thread):
+    """Checks the monitor's heartbeat from outside the loop and dumps the loop thread's stack when it is late."""
+
+    def __init__(self, monitor, loop_thread_id, threshold):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.monitor = monitor
+        self.loop_thread_id = loop_thread_id
+        self.threshold = threshold
+        self.stopped = threading.Event()
+
+    def run(self):
+        reported = None
+        while not self.stopped.wait(self.threshold / 2):
+            beat = self.monitor.heartbeat
+            overdue = time.monotonic() - beat - self.monitor.interval
+            # One capture per blocking episode: the heartbeat moves once the loop runs again
+            if overdue <= self.threshold or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(loop thread not found)\n"
+            blocked_stacks.append((time.time(), overdue, stack))
+            log.warning("Event loop blocked", blocked_s=round(overdue, 3), stack=stack)
+
+class LoopLagMonitor:
+    """Sleeps `interval` seconds in a loop and records how much later than asked it woke up.
+
+    Always on and cheap (one wake-up per interval). With LOOP_DEBUG=1 it also turns on
+    asyncio's debug mode and starts a watchdog thread that captures the stack of any
+    callback holding the loop longer than LOOP_BLOCK_THRESHOLD.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, debug: bool = LOOP_DEBUG,
+                 block_threshold: float = LOOP_BLOCK_THRESHOLD):
+        self.interval = min(interval, block_threshold) if debug else interval
+        self.debug = debug
+        self.block_threshold = block_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.heartbeat = time.monotonic()
+        self._task = None
+        self._watchdog = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start on the running loop (call from a coroutine)."""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self.heartbeat = time.monotonic()
+        self._task = loop.create_task(self._run())
+        if self.debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.block_threshold
+            self._watchdog = _Watchdog(self, threading.get_ident(), self.block_threshold)
+            self._watchdog.start()
+            log.info("Loop debug mode on", block_threshold_s=self.block_threshold)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.stopped.set()
+            self._watchdog = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.heartbeat = time.monotonic()
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            LOOP_LAG_SECONDS.observe(self.lag)
+            LOOP_LAG_CURRENT.set(self.lag)
+            if self.lag > LOOP_LAG_WARN:
+                LOOP_BLOCKED.inc()
+                log.warning("Event loop lagged", sample=True, lag_s=round(self.lag, 3))
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,235 @@
+# Prometheus-style metrics kept in process and rendered in the text exposition format
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A named family of series, one per combination of label values."""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        """[(suffix, label values, extra label pairs, value)] of every series"""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Mirror a running total kept elsewhere (e.g. LRUCache.hits)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (f'le="{_format_value(bound)}"',), cumulative))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+class Registry:
+    """Every metric plus collectors that refresh mirrored values right before a scrape."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def collector(self, func):
+        """Decorator: call func() before each render."""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# Riot API
+RIOT_REQUEST_SECONDS = Histogram("riot_request_seconds", "Riot API request latency", ("endpoint",))
+RIOT_REQUESTS = Counter("riot_requests_total", "Riot API responses by status", ("endpoint", "status"))
+RIOT_RATE_LIMITED = Counter("riot_rate_limited_total", "Riot API 429 responses", ("endpoint", "scope"))
+RIOT_RATE_LIMIT_REMAINING = Gauge(
+    "riot_rate_limit_remaining", "Calls left in each Riot rate limit window, from the last response",
+    ("scope", "endpoint", "window")
+)
+
+# Caches (mirrored from the named LRUCaches on scrape)
+CACHE_HITS = Counter("cache_hits_total", "Cache hits", ("cache",))
+CACHE_MISSES = Counter("cache_misses_total", "Cache misses", ("cache",))
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Hits over lookups since start", ("cache",))
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held", ("cache",))
+
+# OpenAI
+OPENAI_REQUEST_SECONDS = Histogram(
+    "openai_request_seconds", "OpenAI completion latency", ("model",),
+    buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+)
+OPENAI_TOKENS = Counter("openai_tokens_total", "OpenAI tokens used", ("model", "kind"))
+OPENAI_ERRORS = Counter("openai_errors_total", "Failed OpenAI completions", ("model",))
+
+# Database (every run_db/submit_db call)
+DB_QUERY_SECONDS = Histogram("db_query_seconds", "Time spent running a database call", ("op",))
+DB_QUEUE_SECONDS = Histogram("db_queue_seconds", "Time a database call waited for an executor thread", ("op",))
+
+# In-game notifier
+NOTIFIER_CYCLE_SECONDS = Histogram(
+    "notifier_cycle_seconds", "Duration of a notifier cycle over every tracked player",
+    buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+NOTIFIER_BACKLOG = Gauge("notifier_backlog", "Players still to check in the current notifier cycle")
+NOTIFIER_LAST_CYCLE = Gauge("notifier_last_cycle_timestamp_seconds", "Unix time of the last completed notifier cycle")
+NOTIFIER_ERRORS = Counter("notifier_check_errors_total", "Failed per-player notifier checks")
+
+# Discord
+COMMAND_SECONDS = Histogram("command_seconds", "Time from interaction to command completion", ("command",))
+
+# Event loop
+LOOP_LAG_SECONDS = Histogram("event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up", buckets=LAG_BUCKETS)
+LOOP_LAG_CURRENT = Gauge("event_loop_lag_current_seconds", "Event loop lag at the last measurement")
+LOOP_BLOCKED = Counter("event_loop_blocked_total", "Lag measurements above LOOP_LAG_WARN")
+
+_RIOT_ENDPOINTS = (
+    (re.compile(r'/by-riot-id/[^/]+/[^/]+'), '/by-riot-id/{riotId}'),
+    (re.compile(r'/by-(puuid|summoner|name)/[^/]+'), r'/by-\1/{id}'),
+    (re.compile(r'/matches/[A-Za-z0-9]+_\d+'), '/matches/{matchId}'),
+)
+
+def riot_endpoint(url: str) -> str:
+    """Endpoint template of a Riot URL, e.g. /lol/match/v5/matches/{matchId}"""
+    path = url.split('://', 1)[-1].split('?', 1)[0]
+    path = path[path.find('/'):] if '/' in path else '/'
+    for pattern, replacement in _RIOT_ENDPOINTS:
+        path = pattern.sub(replacement, path)
+    return path
+
+def _record_rate_limits(scope, endpoint, limits, counts):
+    if not limits or not counts:
+        return
+    used = {}
+    for pair in counts.split(','):
+        count, window = pair.split(':')
+        used[window] = int(count)
+    for pair in limits.split(','):
+        limit, window = pair.split(':')
+        RIOT_RATE_LIMIT_REMAINING.set(int(limit) - used.get(window, 0), scope=scope, endpoint=endpoint, window=f"{window}s")
+
+def record_riot_response(url: str, response, seconds: float):
+    """Latency, status and rate limit headroom of one Riot API response."""
+    endpoint = riot_endpoint(url)
+    RIOT_REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    RIOT_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    headers = response.headers
+    if response.status_code == 429:
+        RIOT_RATE_LIMITED.inc(endpoint=endpoint, scope=headers.get('X-Rate-Limit-Type', 'unknown'))
+    try:
+        _record_rate_limits('app', '*', headers.get('X-App-Rate-Limit'), headers.get('X-App-Rate-Limit-Count'))
+        _record_rate_limits('method', endpoint, headers.get('X-Method-Rate-Limit'), headers.get('X-Method-Rate-Limit-Count'))
+    except ValueError:
+        pass
+
+@registry.collector
+def _collect_caches():
+    from utils.cache import named_caches
+    for name, cache in named_caches().items():
+        stats = cache.stats()
+        CACHE_HITS.set_total(stats['hits'], cache=name)
+        CACHE_MISSES.set_total(stats['misses'], cache=name)
+        CACHE_HIT_RATIO.set(stats['hit_ratio'], cache=name)
+        CACHE_ENTRIES.set(stats['size'], cache=name)
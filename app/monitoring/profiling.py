@@ -0,0 +1,151 @@
+# On-demand profiling of the running process: sampled CPU stacks, tracemalloc diffs and object counts
+import collections
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from riot import active_game_notify
+from database import summoner_index
+from utils.baselines import baselines
+from utils.cache import named_caches
+from .loop_monitor import blocked_stacks
+from .tracing import traces
+
+CPU_SAMPLE_INTERVAL = float(os.getenv("CPU_SAMPLE_INTERVAL", "0.005"))
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+# Leaf functions of a thread that is waiting rather than running (selector, locks, queues)
+IDLE_FUNCTIONS = frozenset(('select', 'poll', 'wait', '_wait_for_tstate_lock'))
+
+_cpu_lock = threading.Lock()
+_memory_baseline = None
+
+def _where(code, lineno):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+def sample_cpu(seconds: float, interval: float = CPU_SAMPLE_INTERVAL) -> dict:
+    """Sample the stack of every thread for `seconds` (wall clock). Blocking: run it in a thread.
+
+    'self' counts the line each thread was on, 'cumulative' every function on its stack;
+    samples of idle threads (waiting in a selector, lock or queue) are only counted as idle.
+    """
+    if not _cpu_lock.acquire(blocking=False):
+        raise RuntimeError("Ya hay un perfil de CPU en curso.")
+    try:
+        own = threading.get_ident()
+        own_self, cumulative, threads = collections.Counter(), collections.Counter(), collections.Counter()
+        idle = rounds = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if frame.f_code.co_name in IDLE_FUNCTIONS:
+                    idle += 1
+                    continue
+                threads[names.get(ident, str(ident))] += 1
+                own_self[_where(frame.f_code, frame.f_lineno)] += 1
+                seen = set()
+                while frame is not None:
+                    key = _where(frame.f_code, frame.f_code.co_firstlineno)
+                    if key not in seen:
+                        seen.add(key)
+                        cumulative[key] += 1
+                    frame = frame.f_back
+            rounds += 1
+            time.sleep(interval)
+        return {
+            'seconds': seconds,
+            'rounds': rounds,
+            'active': sum(threads.values()),
+            'idle': idle,
+            'threads': threads,
+            'self': own_self,
+            'cumulative': cumulative,
+        }
+    finally:
+        _cpu_lock.release()
+
+def format_cpu_profile(profile: dict, top: int = 20) -> str:
+    active = profile['active'] or 1
+    lines = [
+        f"CPU: {profile['seconds']:.0f} s, {profile['rounds']} rondas de muestreo, "
+        f"{profile['active']} muestras activas, {profile['idle']} en espera",
+        "",
+        "Hilos (muestras activas):",
+    ]
+    lines += [f"  {count / active:6.1%}  {name}" for name, count in profile['threads'].most_common()]
+    lines += ["", f"Top {top} propio (línea en ejecución):"]
+    lines += [f"  {count / active:6.1%}  {where}" for where, count in profile['self'].most_common(top)]
+    lines += ["", f"Top {top} acumulado (función en la pila):"]
+    lines += [f"  {count / active:6.1%}  {where}" for where, count in profile['cumulative'].most_common(top)]
+    return "\n".join(lines)
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+def start_memory_trace(frames: int = MEMORY_TRACE_FRAMES) -> str:
+    """Start tracemalloc (if needed) and take the baseline later diffs compare against."""
+    global _memory_baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _memory_baseline = _snapshot()
+    current, _ = tracemalloc.get_traced_memory()
+    return f"tracemalloc activo ({frames} frames); línea base: {current / 1024 / 1024:.1f} MiB rastreados"
+
+def memory_diff(top: int = 20) -> str:
+    """Top allocation sites that grew since the baseline."""
+    if not tracemalloc.is_tracing() or _memory_baseline is None:
+        raise RuntimeError("tracemalloc no está activo; empieza con memoria_inicio.")
+    stats = _snapshot().compare_to(_memory_baseline, 'lineno')
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Rastreado: {current / 1024 / 1024:.1f} MiB (pico {peak / 1024 / 1024:.1f} MiB)", "", f"Top {top} desde la línea base:"]
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+7d} obj  "
+            f"{os.path.basename(frame.filename)}:{frame.lineno}"
+        )
+    return "\n".join(lines)
+
+def stop_memory_trace() -> str:
+    global _memory_baseline
+    tracemalloc.stop()
+    _memory_baseline = None
+    return "tracemalloc detenido."
+
+def rss_bytes() -> int:
+    """Resident set size of the process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def object_report(bot=None, top: int = 15) -> str:
+    """Sizes of the bot's own holders plus the most common object types."""
+    holders = []
+    if bot is not None:
+        holders.append(("vistas persistentes", len(bot.persistent_views)))
+    holders += [(f"caché {name}", len(cache)) for name, cache in named_caches().items()]
+    holders += [
+        ("mapa de campeones", len(active_game_notify.CHAMPION_ID_TO_NAME or {})),
+        ("índice de invocadores", len(summoner_index)),
+        ("filas de baselines", len(baselines)),
+        ("trazas /perf", len(traces)),
+        ("pilas de bloqueo", len(blocked_stacks)),
+    ]
+    objects = gc.get_objects()
+    types = collections.Counter(type(obj).__name__ for obj in objects)
+    lines = [f"RSS: {rss_bytes() / 1024 / 1024:.1f} MiB · {len(objects):,} objetos rastreados por el GC", "", "Contenedores del bot:"]
+    lines += [f"  {count:>10,}  {name}" for name, count in holders]
+    lines += ["", f"Top {top} tipos:"]
+    lines += [f"  {count:>10,}  {name}" for name, count in types.most_common(top)]
+    return "\n".join(lines)
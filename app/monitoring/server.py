@@ -0,0 +1,47 @@
+# In-process HTTP server (same event loop as the bot) for Prometheus scrapes and health checks
+import os
+from aiohttp import web
+from utils.log import get_logger
+from .metrics import registry
+from .health import health_report, readiness_report
+
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+# The container runs as a non-root user, so the port has to be above 1024
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8080"))
+
+log = get_logger(__name__)
+
+async def metrics_handler(request):
+    return web.Response(
+        body=registry.render().encode(),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+async def health_handler(request):
+    healthy, checks = await health_report(request.app['bot'])
+    return web.json_response({'status': "ok" if healthy else "unhealthy", 'checks': checks}, status=200 if healthy else 503)
+
+async def ready_handler(request):
+    ready, checks = await readiness_report(request.app['bot'])
+    return web.json_response({'status': "ready" if ready else "not_ready", 'checks': checks}, status=200 if ready else 503)
+
+def create_app(bot=None) -> web.Application:
+    app = web.Application()
+    app['bot'] = bot
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/health', health_handler)
+    app.router.add_get('/ready', ready_handler)
+    return app
+
+async def start_http_server(bot=None, host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serve the monitoring endpoints; returns the runner to clean up on shutdown, or None if the port is taken."""
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        log.error("Could not start the metrics server", host=host, port=port, error=e)
+        await runner.cleanup()
+        return None
+    log.info("Metrics server listening", host=host, port=port)
+    return runner
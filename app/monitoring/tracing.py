@@ -0,0 +1,138 @@
+# Lightweight per-command traces: time spent in each stage, kept in a ring buffer for /perf
+import collections
+import contextvars
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "500"))
+
+# Display order of the stages; time outside every span is reported as 'other'
+STAGES = ('riot.account', 'riot.profile', 'riot.match_list', 'riot.match', 'db', 'analysis', 'openai', 'embed', 'discord', 'other')
+
+_trace = contextvars.ContextVar('trace', default=None)
+_span = contextvars.ContextVar('span', default=None)
+
+# Finished traces, newest last
+traces = collections.deque(maxlen=TRACE_BUFFER_SIZE)
+
+class Trace:
+    __slots__ = ('command', 'started', 'stages', 'error')
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.error = False
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+@contextmanager
+def trace(command: str):
+    """Trace everything run inside the block (including threads started with asyncio.to_thread)."""
+    current = Trace(command)
+    token = _trace.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        _trace.reset(token)
+        total = time.perf_counter() - current.started
+        stages = dict(current.stages)
+        stages['other'] = max(0.0, total - sum(stages.values()))
+        traces.append({
+            'command': command,
+            'at': time.time(),
+            'total': total,
+            'stages': stages,
+            'error': current.error,
+        })
+
+def traced(command: str):
+    """Decorator form of trace() for command coroutines."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with trace(command):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def span(stage: str):
+    """Attribute the block's time to a stage of the current trace; a no-op outside a trace.
+
+    Time is self time: a span nested in another (a DB read inside a match fetch) is
+    subtracted from its parent, so the stages of a trace add up to its total.
+    """
+    current = _trace.get()
+    if current is None:
+        yield
+        return
+    parent = _span.get()
+    children = [0.0]
+    token = _span.set(children)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _span.reset(token)
+        current.add(stage, elapsed - children[0])
+        if parent is not None:
+            parent[0] += elapsed
+
+def spanned(stage: str):
+    """Decorator form of span() for functions and coroutines (e.g. embed builders)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with span(stage):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def mark_error():
+    """Flag the current trace as failed (for errors handled inside the command)."""
+    current = _trace.get()
+    if current is not None:
+        current.error = True
+
+def _percentile(values, q):
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def summarize(command: str = None) -> dict:
+    """{command: {'count', 'errors', 'total': (p50, p95), 'stages': {stage: (p50, p95)}}} over the buffer"""
+    by_command = collections.defaultdict(list)
+    for entry in list(traces):
+        if command is None or entry['command'] == command:
+            by_command[entry['command']].append(entry)
+
+    summary = {}
+    for name, entries in by_command.items():
+        totals = sorted(entry['total'] for entry in entries)
+        seen = {stage for entry in entries for stage in entry['stages']}
+        stages = {}
+        for stage in sorted(seen, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            # A stage a trace skipped (cache hit, no AI call) counts as 0 for that trace
+            values = sorted(entry['stages'].get(stage, 0.0) for entry in entries)
+            stages[stage] = (_percentile(values, 0.5), _percentile(values, 0.95))
+        summary[name] = {
+            'count': len(entries),
+            'errors': sum(1 for entry in entries if entry['error']),
+            'total': (_percentile(totals, 0.5), _percentile(totals, 0.95)),
+            'stages': stages,
+        }
+    return summary
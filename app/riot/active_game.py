@@ -1,7 +1,11 @@
 # file: riot/active_game.py - FIXED using Spectator V5 API
-import requests
 import os
-from utils.helpers import make_riot_request, parse_riot_id
+import time
+from utils.helpers import make_riot_request, parse_riot_id, _import_requests
+from utils.log import get_logger
+from monitoring.metrics import record_riot_response
+
+log = get_logger(__name__)
 
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 
@@ -10,40 +14,40 @@ def get_active_game_by_puuid(puuid, platforms=['la1']):
     Check if a summoner is currently in an active game using Spectator V5 API with PUUID.
     This is the correct solution since V5 accepts PUUID directly!
     """
+    requests = _import_requests()
     for platform in platforms:
         try:
             # Use V5 API that accepts PUUID directly
             url = f"https://{platform}.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{puuid}"
             headers = {"X-Riot-Token": RIOT_API_KEY}
             
-            print(f"[ActiveGame] Checking active game on {platform} using PUUID (V5 API)")
+            started = time.perf_counter()
             response = requests.get(url, headers=headers)
+            record_riot_response(url, response, time.perf_counter() - started)
             
             if response.status_code == 404:
-                print(f"[ActiveGame] No active game found on {platform}")
                 continue  # Try next platform
             
             if response.status_code == 200:
                 game_data = response.json()
-                print(f"[ActiveGame] Found active game on {platform}!")
+                log.debug("Active game found", platform=platform, puuid=puuid)
                 return game_data
             
             # For other status codes, log and continue
-            print(f"[ActiveGame] Status {response.status_code} on {platform}: {response.text}")
+            log.warning("Unexpected spectator status", platform=platform, status=response.status_code, body=response.text[:200])
             response.raise_for_status()
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 continue  # Expected when not in game
             else:
-                print(f"[ActiveGame] HTTP error on {platform}: {e}")
+                log.warning("Spectator HTTP error", platform=platform, error=e)
                 continue
         except Exception as e:
-            print(f"[ActiveGame] Error checking {platform}: {e}")
+            log.warning("Spectator check failed", platform=platform, error=e)
             continue
     
     # If we get here, no active game found on any platform
-    print(f"[ActiveGame] No active game found for PUUID {puuid} on any platform")
     return None
 
 
@@ -52,8 +56,8 @@ def get_active_game_by_summoner_id(summoner_id, platform="la1"):
     """
     Legacy function - now just logs a warning since we don't have summoner IDs
     """
-    print(f"[ActiveGame] WARNING: get_active_game_by_summoner_id called but summoner IDs not available in LAN API")
-    print(f"[ActiveGame] Use get_active_game_by_puuid instead")
+    log.warning("get_active_game_by_summoner_id called but summoner IDs are not available in LAN API; "
+                "use get_active_game_by_puuid instead")
     return None
 
 
@@ -66,8 +70,7 @@ def get_active_game_by_summoner_data(summoner_data):
     puuid = summoner_data.get('puuid')
     
     if not puuid:
-        print("[ActiveGame] No PUUID available in summoner data")
+        log.warning("No PUUID available in summoner data")
         return None
     
-    print(f"[ActiveGame] Checking active game for PUUID: {puuid}")
     return get_active_game_by_puuid(puuid)
\ No newline at end of file
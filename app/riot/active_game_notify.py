@@ -5,10 +5,17 @@ import time
 import aiohttp
 from riot.api import get_summoner_data
 from riot.active_game import get_active_game_by_summoner_data
-from database.summoners import get_summoners_for_autocomplete
+from database import get_summoners_for_autocomplete_async
+from utils.log import get_logger
+from monitoring.metrics import NOTIFIER_CYCLE_SECONDS, NOTIFIER_BACKLOG, NOTIFIER_LAST_CYCLE, NOTIFIER_ERRORS
+
+log = get_logger(__name__)
 
 CHECK_INTERVAL = 300  # Check every 5 minutes
 
+# Read by /health: when a notifier started and when one last completed a cycle (unix time)
+notifier_status = {'started': None, 'last_cycle': None}
+
 CHAMPION_ID_TO_NAME = None  # Will be loaded dynamically
 
 async def fetch_champion_id_to_name():
@@ -118,18 +125,18 @@ async def check_bot_permissions(channel):
         if hasattr(channel, 'permissions_for'):
             bot_permissions = channel.permissions_for(channel.guild.me)
             
-            print(f"[ActiveGameNotify] Bot permissions in #{channel.name}:")
-            print(f"  - Send Messages: {bot_permissions.send_messages}")
-            print(f"  - Embed Links: {bot_permissions.embed_links}")
-            print(f"  - Use External Emojis: {bot_permissions.use_external_emojis}")
-            print(f"  - Read Message History: {bot_permissions.read_message_history}")
+            log.info("Bot permissions", channel=channel.name,
+                     send_messages=bot_permissions.send_messages,
+                     embed_links=bot_permissions.embed_links,
+                     use_external_emojis=bot_permissions.use_external_emojis,
+                     read_message_history=bot_permissions.read_message_history)
             
             return bot_permissions.embed_links
         else:
-            print(f"[ActiveGameNotify] Cannot check permissions - not a guild channel")
+            log.warning("Cannot check permissions, not a guild channel")
             return False
     except Exception as e:
-        print(f"[ActiveGameNotify] Error checking permissions: {e}")
+        log.warning("Error checking permissions", error=e)
         return False
 
 async def create_active_games_embed(active_players_info):
@@ -183,18 +190,18 @@ async def check_bot_permissions(channel):
         if hasattr(channel, 'permissions_for'):
             bot_permissions = channel.permissions_for(channel.guild.me)
             
-            print(f"[ActiveGameNotify] Bot permissions in #{channel.name}:")
-            print(f"  - Send Messages: {bot_permissions.send_messages}")
-            print(f"  - Embed Links: {bot_permissions.embed_links}")
-            print(f"  - Use External Emojis: {bot_permissions.use_external_emojis}")
-            print(f"  - Read Message History: {bot_permissions.read_message_history}")
+            log.info("Bot permissions", channel=channel.name,
+                     send_messages=bot_permissions.send_messages,
+                     embed_links=bot_permissions.embed_links,
+                     use_external_emojis=bot_permissions.use_external_emojis,
+                     read_message_history=bot_permissions.read_message_history)
             
             return bot_permissions.embed_links
         else:
-            print(f"[ActiveGameNotify] Cannot check permissions - not a guild channel")
+            log.warning("Cannot check permissions, not a guild channel")
             return False
     except Exception as e:
-        print(f"[ActiveGameNotify] Error checking permissions: {e}")
+        log.warning("Error checking permissions", error=e)
         return False
 
 async def notify_active_games_task(bot: discord.Client, channel_id: int = None, user_id: int = None):
@@ -203,7 +210,7 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
     if channel_id is not None:
         target = bot.get_channel(channel_id)
         if target is None:
-            print(f"[ActiveGameNotify] Channel ID {channel_id} not found.")
+            log.error("Channel not found", channel_id=channel_id)
             return
         # Check and log bot permissions in the channel
         await check_bot_permissions(target)
@@ -211,29 +218,32 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
         try:
             target = await bot.fetch_user(user_id)
         except Exception as e:
-            print(f"[ActiveGameNotify] User ID {user_id} not found: {e}")
+            log.error("User not found", user_id=user_id, error=e)
             return
     else:
-        print("[ActiveGameNotify] No channel_id or user_id provided.")
+        log.error("No channel_id or user_id provided")
         return
 
     last_active = set()
     consecutive_errors = {}
+    notifier_status['started'] = notifier_status['started'] or time.time()
 
     while not bot.is_closed():
         try:
-            riot_ids = get_summoners_for_autocomplete(limit=100)
+            cycle_started = time.perf_counter()
+            riot_ids = await get_summoners_for_autocomplete_async(limit=100)
             active_now = {}
-            print(f"[ActiveGameNotify] === Checking {len(riot_ids)} players ===")
+            log.debug("Cycle started", players=len(riot_ids))
+            NOTIFIER_BACKLOG.set(len(riot_ids))
             
             for riot_id in riot_ids:
+                NOTIFIER_BACKLOG.dec()
                 try:
                     # Skip players with too many consecutive errors
                     if consecutive_errors.get(riot_id, 0) >= 3:
-                        print(f"[ActiveGameNotify] Skipping {riot_id} due to repeated errors")
+                        log.debug("Skipping player after repeated errors", riot_id=riot_id)
                         continue
                     
-                    print(f"[ActiveGameNotify] Checking {riot_id}")
                     game_name, tag_line = riot_id.split('#', 1)
                     
                     # Get summoner data (this gives us puuid)
@@ -241,7 +251,7 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
                     
                     # Check if we have puuid
                     if 'puuid' not in summoner:
-                        print(f"[ActiveGameNotify] Warning: No 'puuid' field for {riot_id}")
+                        log.warning("No puuid for player", riot_id=riot_id)
                         consecutive_errors[riot_id] = consecutive_errors.get(riot_id, 0) + 1
                         continue
                     
@@ -249,7 +259,7 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
                     active_game = get_active_game_by_summoner_data(summoner)
                     
                     is_active = bool(active_game)
-                    print(f"[ActiveGameNotify] {riot_id} active_game: {is_active}")
+                    log.debug("Player checked", sample=True, riot_id=riot_id, active=is_active)
                     
                     if is_active and active_game:
                         # Extract detailed game information
@@ -286,7 +296,8 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
                         del consecutive_errors[riot_id]
                         
                 except Exception as ex:
-                    print(f"[ActiveGameNotify] Error checking {riot_id}: {ex}")
+                    log.warning("Error checking player", riot_id=riot_id, error=ex)
+                    NOTIFIER_ERRORS.inc()
                     consecutive_errors[riot_id] = consecutive_errors.get(riot_id, 0) + 1
                     continue
               # Calculate changes and send notifications
@@ -295,7 +306,7 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
             finished_games = last_active - current_active_ids
             
             if new_in_game:
-                print(f"[ActiveGameNotify] New players in game: {new_in_game}")
+                log.info("Players entered a game", players=sorted(new_in_game))
                 
                 # Get detailed info for new players
                 new_players_info = [active_now[riot_id] for riot_id in new_in_game]
@@ -306,12 +317,12 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
                     
                     if embed:
                         await target.send(embed=embed)
-                        print(f"[ActiveGameNotify] Sent detailed embed for {len(new_players_info)} players")
+                        log.debug("Sent notification embed", players=len(new_players_info))
                     else:
                         raise Exception("Embed creation failed")
                         
                 except discord.Forbidden:
-                    print(f"[ActiveGameNotify] No permission to send embeds, falling back to rich text message")
+                    log.warning("No permission to send embeds, falling back to a text message")
                     # Create a rich text message with game details
                     message_lines = ["🎮 **Amigos que entraron en partida:**\n"]
                     
@@ -332,7 +343,7 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
                     await target.send(msg)
                     
                 except Exception as e:
-                    print(f"[ActiveGameNotify] Error sending embed notification: {e}")
+                    log.warning("Error sending notification embed", error=e)
                     # Final fallback to simple message
                     players_list = ', '.join([f"**{player}**" for player in new_in_game])
                     msg = f'🎮 Amigos que entraron en partida: {players_list}'
@@ -340,22 +351,23 @@ async def notify_active_games_task(bot: discord.Client, channel_id: int = None,
             
             # Optional: notify when games end
             if finished_games:
-                print(f"[ActiveGameNotify] Players finished games: {finished_games}")
+                log.info("Players finished a game", players=sorted(finished_games))
                 players_list = ', '.join([f"**{player}**" for player in finished_games])
                 msg = f'🏁 Amigos que terminaron partida: {players_list}'
                 await target.send(msg)
             
-            if not new_in_game and not finished_games:
-                print(f"[ActiveGameNotify] No changes. Currently active: {len(current_active_ids)}")
-            
             # Clean up old errors
             consecutive_errors = {k: v for k, v in consecutive_errors.items() if v < 5}
             
             last_active = current_active_ids
             
-            print(f"[ActiveGameNotify] === Cycle complete. Active players: {len(current_active_ids)} ===")
+            cycle_seconds = time.perf_counter() - cycle_started
+            NOTIFIER_CYCLE_SECONDS.observe(cycle_seconds)
+            notifier_status['last_cycle'] = time.time()
+            NOTIFIER_LAST_CYCLE.set(notifier_status['last_cycle'])
+            log.debug("Cycle complete", players=len(riot_ids), active=len(current_active_ids), seconds=round(cycle_seconds, 1))
             
         except Exception as e:
-            print(f"[ActiveGameNotify] Critical error in main loop: {e}")
+            log.exception("Critical error in notifier loop")
         
         await asyncio.sleep(CHECK_INTERVAL)
\ No newline at end of file
@@ -1,28 +1,95 @@
-import requests
+import asyncio
 import os
-from utils.helpers import make_riot_request, parse_riot_id
+from utils.helpers import make_riot_request, parse_riot_id, riot_request_exception
+from utils.cache import LRUCache
+from monitoring.tracing import span
+from database import run_db, submit_db, save_match, get_stored_match, get_stored_match_ids, increment_counter
 
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 
+# Match payloads never change once a game is over, so they can be cached indefinitely
+MATCH_CACHE_SIZE = int(os.getenv("MATCH_CACHE_SIZE", "256"))
+match_cache = LRUCache(maxsize=MATCH_CACHE_SIZE, name="match")
+# Reverse index over the cached matches: match_id -> puuids of its participants
+match_participants = LRUCache(maxsize=MATCH_CACHE_SIZE * 4, name="match_participants")
+
+# Profiles (icon, level) change slowly; keep them for a while so buttons can rebuild embeds
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "1800"))
+profile_cache = LRUCache(maxsize=1024, ttl=PROFILE_CACHE_TTL, name="profile")
+
+# Riot ID -> account (puuid); a Riot ID only changes hands on a name change
+ACCOUNT_CACHE_TTL = int(os.getenv("ACCOUNT_CACHE_TTL", "86400"))
+account_cache = LRUCache(maxsize=1024, ttl=ACCOUNT_CACHE_TTL, name="account")
+
+# Most match downloads a single /perfil may trigger; the rest are filled in by later calls
+PROFILE_SYNC_BUDGET = int(os.getenv("PROFILE_SYNC_BUDGET", "5"))
+
+def account_cache_key(game_name, tag_line):
+    return (game_name.lower(), tag_line.lower())
+
 def get_summoner_data(game_name, tag_line):
     """Fetch summoner data by Riot ID."""
-    url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    return make_riot_request(url)
+    key = account_cache_key(game_name, tag_line)
+    summoner = account_cache.get(key)
+    if summoner is None:
+        url = f"https://americas.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+        with span("riot.account"):
+            summoner = make_riot_request(url)
+        account_cache.put(key, summoner)
+    return summoner
 
 def get_summoner_profile_data(puuid):
     """Fetch summoner profile data from regional API to get profile icon."""
     url = f"https://la1.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    return make_riot_request(url)
+    with span("riot.profile"):
+        profile = make_riot_request(url)
+    profile_cache.put(puuid, profile)
+    return profile
+
+def get_cached_profile(puuid):
+    """Last known profile of a player, without calling the API (None if unknown)."""
+    return profile_cache.get(puuid)
 
 def get_match_history(puuid, matches=1):
     """Fetch match history by PUUID."""
     url = f"https://americas.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={matches}"
-    return make_riot_request(url)
+    with span("riot.match_list"):
+        return make_riot_request(url)
 
 def get_match_data(match_id):
     """Fetch match data by match ID."""
     url = f"https://americas.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    return make_riot_request(url)
+    with span("riot.match"):
+        return make_riot_request(url)
+
+def _cache_match(match_id, match_data):
+    match_cache.put(match_id, match_data)
+    match_participants.put(match_id, frozenset(p['puuid'] for p in match_data['info']['participants']))
+
+def match_has_player(match_id, puuid):
+    """Whether a cached match includes the player (False if the match is not cached)."""
+    puuids = match_participants.get(match_id)
+    return puuids is not None and puuid in puuids
+
+async def fetch_match(match_id):
+    """Get a match from the memory cache, the local match store or the Riot API, in that order."""
+    match_data = match_cache.get(match_id)
+    if match_data is not None:
+        increment_counter('match_cache_hits')
+        return match_data
+    
+    match_data = await run_db(get_stored_match, match_id)
+    if match_data is None:
+        # The download runs in a thread so the warm-up and commands do not stall the event loop
+        match_data = await asyncio.to_thread(get_match_data, match_id)
+        increment_counter('match_cache_misses')
+        # Persist it in the background; the command does not wait for the write
+        submit_db(save_match, match_data)
+    else:
+        increment_counter('match_cache_hits')
+    
+    _cache_match(match_id, match_data)
+    return match_data
 
 async def get_player_match_data(riot_id):
     """Get player's latest match data. Returns (participant, match_data, game_duration, summoner_profile)."""
@@ -38,12 +105,36 @@ async def get_player_match_data(riot_id):
         if not matches:
             raise ValueError("No se encontraron partidas recientes.")
         
-        match_data = get_match_data(matches[0])
+        match_data = await fetch_match(matches[0])
+        participant = next(p for p in match_data["info"]["participants"] if p["puuid"] == puuid)
+        game_duration = match_data["info"]["gameDuration"] // 60
+        
+        return participant, match_data, game_duration, summoner_profile
+    except riot_request_exception():
+        raise ValueError("Error al conectar con la API de Riot.")
+
+async def get_participant_latest_match(puuid, match_data=None):
+    """Latest match of a player already known by PUUID, e.g. an ally in a loaded match.
+
+    Skips the account lookup, reuses match_data when it is still the player's latest match
+    and takes the profile from the cache, so usually the only Riot call is the match list.
+    Returns (participant, match_data, game_duration, summoner_profile).
+    """
+    try:
+        matches = get_match_history(puuid)
+        if not matches:
+            raise ValueError("No se encontraron partidas recientes.")
+        
+        latest = matches[0]
+        if match_data is None or match_data["metadata"]["matchId"] != latest or not match_has_player(latest, puuid):
+            match_data = await fetch_match(latest)
+        
+        summoner_profile = get_cached_profile(puuid) or get_summoner_profile_data(puuid)
         participant = next(p for p in match_data["info"]["participants"] if p["puuid"] == puuid)
         game_duration = match_data["info"]["gameDuration"] // 60
         
         return participant, match_data, game_duration, summoner_profile
-    except requests.exceptions.RequestException:
+    except riot_request_exception():
         raise ValueError("Error al conectar con la API de Riot.")
 
 async def get_player_multiple_matches(riot_id: str, count: int = 5):
@@ -62,11 +153,38 @@ async def get_player_multiple_matches(riot_id: str, count: int = 5):
         
         match_results = []
         for match_id in matches:
-            match_data = get_match_data(match_id)
+            match_data = await fetch_match(match_id)
             participant = next(p for p in match_data["info"]["participants"] if p["puuid"] == puuid)
             game_duration = match_data["info"]["gameDuration"] // 60
             match_results.append((participant, match_data, game_duration, match_id))
         
         return match_results, summoner_profile
-    except requests.exceptions.RequestException:
+    except riot_request_exception():
+        raise ValueError("Error al conectar con la API de Riot.")
+
+async def sync_recent_matches(riot_id: str, count: int, budget: int = PROFILE_SYNC_BUDGET):
+    """Store up to `budget` of the player's last `count` matches that are missing locally. Returns the puuid."""
+    try:
+        game_name, tag_line = parse_riot_id(riot_id)
+        # Riot calls run in threads, like fetch_match, so a sync never stalls the event loop
+        summoner = await asyncio.to_thread(get_summoner_data, game_name, tag_line)
+        puuid = summoner['puuid']
+        
+        match_ids = await asyncio.to_thread(get_match_history, puuid, count) or []
+        stored = await run_db(get_stored_match_ids, match_ids)
+        if len(stored) >= len(match_ids):
+            # Riot has no game the store does not already hold (e.g. a short history)
+            return puuid
+        
+        for match_id in [m for m in match_ids if m not in stored][:budget]:
+            match_data = match_cache.get(match_id)
+            if match_data is None:
+                match_data = await asyncio.to_thread(get_match_data, match_id)
+                increment_counter('match_cache_misses')
+                _cache_match(match_id, match_data)
+            # Awaited (unlike fetch_match) so the aggregates are current when the caller reads them
+            await run_db(save_match, match_data)
+        
+        return puuid
+    except riot_request_exception():
         raise ValueError("Error al conectar con la API de Riot.")
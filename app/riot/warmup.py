@@ -0,0 +1,90 @@
+# Background warm-up of the Riot caches for the most searched summoners
+import asyncio
+import os
+import time
+from database import summoner_index
+from riot.api import (
+    get_summoner_data, get_summoner_profile_data, get_match_history, fetch_match,
+    account_cache, account_cache_key, profile_cache, match_cache
+)
+from riot.active_game_notify import fetch_champion_id_to_name
+from utils.helpers import parse_riot_id
+from utils.log import get_logger
+
+log = get_logger(__name__)
+
+WARMUP_SUMMONERS = int(os.getenv("WARMUP_SUMMONERS", "20"))
+# Riot calls the warm-up may spend in total; a cold summoner needs up to CALLS_PER_SUMMONER
+WARMUP_REQUEST_BUDGET = int(os.getenv("WARMUP_REQUEST_BUDGET", "60"))
+# Pause between summoners so commands keep most of the rate limit
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "1.0"))
+CALLS_PER_SUMMONER = 4
+
+warmup_status = {
+    'state': 'idle',  # idle -> running -> done
+    'done': 0,
+    'total': 0,
+    'requests': 0,
+    'errors': 0,
+    'seconds': 0.0,
+}
+
+async def warm_summoner(riot_id: str) -> int:
+    """Cache the account, profile and latest match of one summoner. Returns the Riot calls spent."""
+    game_name, tag_line = parse_riot_id(riot_id)
+    spent = 0
+
+    # Blocking requests run in threads so the warm-up never delays command handling
+    if account_cache_key(game_name, tag_line) not in account_cache:
+        spent += 1
+    summoner = await asyncio.to_thread(get_summoner_data, game_name, tag_line)
+    puuid = summoner['puuid']
+
+    if puuid not in profile_cache:
+        spent += 1
+        await asyncio.to_thread(get_summoner_profile_data, puuid)
+
+    # The match list is never cached (it changes every game), but the match it points to is
+    spent += 1
+    matches = await asyncio.to_thread(get_match_history, puuid)
+    if matches and matches[0] not in match_cache:
+        spent += 1
+        await fetch_match(matches[0])
+    return spent
+
+async def warm_caches(limit: int = WARMUP_SUMMONERS, budget: int = WARMUP_REQUEST_BUDGET):
+    """Warm the caches for the top tracked summoners within a Riot call budget, reporting progress."""
+    if warmup_status['state'] != 'idle':
+        return
+    started = time.perf_counter()
+    riot_ids = summoner_index.top(limit)
+    warmup_status.update(state='running', total=len(riot_ids))
+    log.info("Warming caches", summoners=len(riot_ids), budget=budget)
+
+    # Data Dragon champion map used by the in-game notifier (not part of the Riot budget)
+    try:
+        await fetch_champion_id_to_name()
+    except Exception as e:
+        log.warning("Could not load the Data Dragon champion map", error=e)
+
+    for riot_id in riot_ids:
+        if warmup_status['requests'] + CALLS_PER_SUMMONER > budget:
+            log.info("Budget reached", summoners=warmup_status['done'], requests=warmup_status['requests'])
+            break
+        try:
+            warmup_status['requests'] += await warm_summoner(riot_id)
+        except Exception as e:
+            warmup_status['requests'] += CALLS_PER_SUMMONER
+            warmup_status['errors'] += 1
+            log.warning("Could not warm summoner", riot_id=riot_id, error=e)
+        warmup_status['done'] += 1
+        warmup_status['seconds'] = time.perf_counter() - started
+
+        if warmup_status['done'] % 5 == 0 or warmup_status['done'] == warmup_status['total']:
+            log.info("Progress", done=warmup_status['done'], total=warmup_status['total'],
+                     requests=warmup_status['requests'], errors=warmup_status['errors'])
+        await asyncio.sleep(WARMUP_DELAY)
+
+    warmup_status['state'] = 'done'
+    warmup_status['seconds'] = time.perf_counter() - started
+    log.info("Done", seconds=round(warmup_status['seconds'], 1))
@@ -1,11 +1,17 @@
 from discord import app_commands
-from database import get_summoners_for_autocomplete
+from database import get_summoners_for_autocomplete_async, summoner_index
+from utils.log import get_logger
+
+log = get_logger(__name__)
 
 async def riot_id_autocomplete(interaction, current: str):
     """Autocomplete function for riot_id parameters"""
     try:
-        # Get matching summoners from database
-        summoners = get_summoners_for_autocomplete(current, limit=25)
+        # Answer from the in-memory index; the database is only a fallback until it loads
+        if summoner_index.loaded:
+            summoners = summoner_index.search(current, limit=25)
+        else:
+            summoners = await get_summoners_for_autocomplete_async(current, limit=25)
         
         # Return as autocomplete choices
         return [
@@ -13,5 +19,5 @@ async def riot_id_autocomplete(interaction, current: str):
             for summoner in summoners
         ]
     except Exception as e:
-        print(f"Error in autocomplete: {e}")
+        log.warning("Error in autocomplete", sample=True, query=current, error=e)
         return []
@@ -0,0 +1,193 @@
+# Percentile baselines per role, queue and game length, built from stored participants
+import os
+import threading
+import numpy as np
+
+# Column order of the rows fed to the engine (a subset of the participants table)
+BASELINE_COLUMNS = (
+    'team_position', 'queue_id', 'game_duration', 'kills', 'deaths', 'assists', 'damage_to_champions',
+    'total_minions', 'neutral_minions', 'vision_score', 'gold_earned', 'champ_level'
+)
+METRICS = ('cs_per_min', 'gold_per_min', 'vision_per_min', 'damage_per_min', 'kda', 'champ_level')
+METRIC_LABELS = {
+    'cs_per_min': "CS/min",
+    'gold_per_min': "Oro/min",
+    'vision_per_min': "Visión/min",
+    'damage_per_min': "Daño/min",
+    'kda': "KDA",
+    'champ_level': "Nivel",
+}
+
+ROLES = ('TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY', 'NONE')
+# Game length buckets in minutes: <20, 20-25, 25-30, 30-35, 35+
+DURATION_EDGES = np.array([20, 25, 30, 35])
+DURATION_LABELS = ("<20 min", "20-25 min", "25-30 min", "30-35 min", "35+ min")
+
+# A group needs this many samples before its percentiles are trusted; otherwise a coarser one is used
+MIN_SAMPLES = 30
+QUANTILES = np.arange(1, 100) / 100
+# Most recent samples kept per group; older ones fall out of the window so memory stays bounded
+BASELINE_MAX_SAMPLES = int(os.getenv("BASELINE_MAX_SAMPLES", "20000"))
+# Seconds between rebuilds of the groups that received new matches
+BASELINE_REFRESH_INTERVAL = float(os.getenv("BASELINE_REFRESH_INTERVAL", "60"))
+
+def _duration_bucket(minutes):
+    return np.digitize(minutes, DURATION_EDGES)
+
+def _metric_matrix(rows):
+    """(roles, queues, buckets, metrics) arrays for rows in BASELINE_COLUMNS order"""
+    roles = np.fromiter((ROLES.index(r[0]) if r[0] in ROLES else len(ROLES) - 1 for r in rows), dtype=np.int64, count=len(rows))
+    data = np.nan_to_num(np.array([r[1:] for r in rows], dtype=np.float64).reshape(len(rows), len(BASELINE_COLUMNS) - 1))
+    queues = data[:, 0].astype(np.int64)
+    minutes = np.maximum(data[:, 1] / 60.0, 1.0)
+    kills, deaths, assists, damage, minions, monsters, vision, gold, level = data[:, 2:].T
+    metrics = np.column_stack([
+        (minions + monsters) / minutes,
+        gold / minutes,
+        vision / minutes,
+        damage / minutes,
+        (kills + assists) / np.maximum(deaths, 1),
+        level,
+    ]).astype(np.float32)
+    return roles, queues, _duration_bucket(minutes), metrics
+
+class BaselineEngine:
+    """Percentile cut points of every metric, per (role, queue, duration bucket).
+
+    Coarser (role, queue) and (role,) groups back up buckets with too few samples.
+    New rows only mark their groups dirty and refresh() rebuilds them off the event loop,
+    so ingesting a match costs O(1) and a lookup is a dict hit plus a search over 99 cut
+    points. Until the next refresh, lookups see the previous tables.
+    """
+
+    def __init__(self):
+        self._samples = {}
+        self._tables = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        # Bumped by load(), so a refresh that raced with it does not swap in old samples
+        self._generation = 0
+        self.loaded = False
+
+    def __len__(self):
+        """Number of participant rows behind the tables."""
+        with self._lock:
+            return sum(sum(len(chunk) for chunk in chunks) for key, chunks in self._samples.items() if len(key) == 1)
+
+    def _group(self, rows):
+        """Split rows into {key: metric matrix} for every grouping level."""
+        roles, queues, buckets, metrics = _metric_matrix(rows)
+        groups = {}
+        for columns in ((roles, queues, buckets), (roles, queues), (roles,)):
+            keys, inverse = np.unique(np.column_stack(columns), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+            for key, chunk in zip(keys, np.split(metrics[order], bounds)):
+                groups[(ROLES[key[0]],) + tuple(int(k) for k in key[1:])] = chunk
+        return groups
+
+    def load(self, rows):
+        """Replace every table with quantiles over rows (BASELINE_COLUMNS order)."""
+        groups = {key: chunk[-BASELINE_MAX_SAMPLES:] for key, chunk in self._group(rows).items()} if rows else {}
+        tables = {key: (len(chunk), np.quantile(chunk, QUANTILES, axis=0).T) for key, chunk in groups.items()}
+        with self._lock:
+            self._samples = {key: [chunk] for key, chunk in groups.items()}
+            self._tables = tables
+            self._dirty.clear()
+            self._generation += 1
+            self.loaded = True
+
+    def add_rows(self, rows):
+        """Queue new participant rows; their groups are rebuilt on the next refresh()."""
+        if not rows:
+            return
+        groups = self._group(rows)
+        with self._lock:
+            for key, chunk in groups.items():
+                self._samples.setdefault(key, []).append(chunk)
+                self._dirty.add(key)
+
+    @property
+    def pending(self):
+        """True if some group has rows its table does not include yet."""
+        return bool(self._dirty)
+
+    def refresh(self):
+        """Rebuild the tables of dirty groups and swap them in. Returns the number of groups rebuilt.
+
+        Blocking (numpy over up to BASELINE_MAX_SAMPLES rows per group); run it on an executor.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            generation = self._generation
+            taken = {key: self._samples.pop(key, []) for key in dirty}
+            for key in dirty:
+                self._samples[key] = []
+        rebuilt = {}
+        for key, chunks in taken.items():
+            if chunks:
+                samples = np.concatenate(chunks)[-BASELINE_MAX_SAMPLES:]
+                rebuilt[key] = (samples, np.quantile(samples, QUANTILES, axis=0).T)
+        with self._lock:
+            if generation != self._generation:
+                return 0
+            for key, (samples, cuts) in rebuilt.items():
+                # Rows added while rebuilding stay after the window and keep the group dirty
+                self._samples[key].insert(0, samples)
+                self._tables[key] = (len(samples), cuts)
+        return len(rebuilt)
+
+    def lookup(self, role, queue_id=None, duration_s=None):
+        """Most specific group with enough samples: (key, samples, cut points) or None."""
+        role = role if role in ROLES else 'NONE'
+        keys = []
+        if queue_id is not None:
+            if duration_s:
+                keys.append((role, int(queue_id), int(_duration_bucket(max(duration_s / 60.0, 1.0)))))
+            keys.append((role, int(queue_id)))
+        keys.append((role,))
+        tables = self._tables
+        for key in keys:
+            table = tables.get(key)
+            if table is not None and table[0] >= MIN_SAMPLES:
+                return key, table[0], table[1]
+        return None
+
+    def describe(self, participant, queue_id=None, duration_s=None):
+        """Percentile (0-99) of each metric of a participant against its baseline group, or None."""
+        role = participant.get('teamPosition') or 'NONE'
+        found = self.lookup(role, queue_id, duration_s)
+        if found is None:
+            return None
+        key, samples, cuts = found
+        row = (role, queue_id or 0, duration_s or 0, participant.get('kills', 0), participant.get('deaths', 0),
+               participant.get('assists', 0), participant.get('totalDamageDealtToChampions', 0),
+               participant.get('totalMinionsKilled', 0), participant.get('neutralMinionsKilled', 0),
+               participant.get('visionScore', 0), participant.get('goldEarned', 0), participant.get('champLevel', 0))
+        values = _metric_matrix([row])[3][0]
+        return {
+            'group': key,
+            'samples': samples,
+            'percentiles': {
+                metric: int(np.searchsorted(cuts[i], values[i], side='right'))
+                for i, metric in enumerate(METRICS)
+            },
+            # Median of the group, handy as a target ("lo normal es ...")
+            'medians': {metric: float(cuts[i][49]) for i, metric in enumerate(METRICS)},
+        }
+
+def format_baseline_group(key):
+    """Readable label of a baseline group, e.g. 'MIDDLE · cola 420 · 25-30 min'"""
+    parts = [key[0]]
+    if len(key) > 1:
+        parts.append(f"cola {key[1]}")
+    if len(key) > 2:
+        parts.append(DURATION_LABELS[key[2]])
+    return " · ".join(parts)
+
+def format_percentiles(baseline, metrics=METRICS):
+    """'CS/min p23 · Oro/min p40 ...' for a describe() result"""
+    return " · ".join(f"{METRIC_LABELS[m]} p{baseline['percentiles'][m]}" for m in metrics)
+
+baselines = BaselineEngine()
@@ -0,0 +1,72 @@
+# Small in-process caches
+import threading
+import time
+from collections import OrderedDict
+
+# name -> cache, for caches that report to /metrics
+_named_caches = {}
+
+def named_caches() -> dict:
+    return dict(_named_caches)
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry and counts hits/misses.
+
+    With ``ttl`` (seconds) entries also expire after that long. Safe to share with
+    worker threads (the warm-up fetches from a thread). Caches given a ``name`` are
+    exported to /metrics.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = None, name: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            _named_caches[name] = self
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,25 @@
+# Cache of rendered match embeds, stored as serialized payloads
+import os
+import discord
+from utils.cache import LRUCache
+
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "512"))
+EMBED_LOCALE = "es"
+# Bump when an embed layout changes so stale payloads are not served
+EMBED_VERSION = 2
+
+embed_cache = LRUCache(maxsize=EMBED_CACHE_SIZE, name="embed")
+
+def embed_cache_key(match_id, puuid, kind):
+    """Key for a rendered embed: (match_id, puuid, kind, locale, version)."""
+    return (match_id, puuid, kind, EMBED_LOCALE, EMBED_VERSION)
+
+def get_cached_embed(match_id, puuid, kind):
+    """Rebuild a cached embed, or return None on a miss."""
+    payload = embed_cache.get(embed_cache_key(match_id, puuid, kind))
+    return discord.Embed.from_dict(payload) if payload is not None else None
+
+def cache_embed(match_id, puuid, kind, embed):
+    """Store the serialized embed and hand it back."""
+    embed_cache.put(embed_cache_key(match_id, puuid, kind), embed.to_dict())
+    return embed
@@ -1,6 +1,11 @@
-import requests
 import os
+import time
 import discord
+from utils.embed_cache import get_cached_embed, cache_embed
+from utils.scoring import ParticipantBatch
+from utils.baselines import baselines, format_baseline_group, format_percentiles
+from monitoring.metrics import record_riot_response
+from monitoring.tracing import span, spanned, mark_error
 
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 
@@ -17,6 +22,15 @@ def _import_generar_mensaje_openai():
     from ai.openai_service import generar_mensaje_openai
     return generar_mensaje_openai
 
+# requests is only needed once the bot talks to Riot, so it stays out of the startup path
+def _import_requests():
+    import requests
+    return requests
+
+def riot_request_exception():
+    """Base exception of failed Riot HTTP requests, for use in except clauses."""
+    return _import_requests().exceptions.RequestException
+
 def parse_riot_id(riot_id):
     """Parse and validate Riot ID format."""
     if "#" not in riot_id:
@@ -29,10 +43,24 @@ def get_player_name(participant):
             participant.get('summonerName') or 
             f"Player_{participant.get('participantId', 'Unknown')}")
 
+def get_player_riot_id(participant):
+    """Extract full Riot ID from participant data (Name#Tag format)"""
+    game_name = participant.get('riotIdGameName')
+    tag_line = participant.get('riotIdTagline')  # Fixed: was 'riotIdTagLine'
+    
+    if game_name and tag_line:
+        return f"{game_name}#{tag_line}"
+    
+    # If we don't have both parts, we can't create a valid Riot ID
+    # Return None so the button gets disabled
+    return None
+
 def make_riot_request(url):
     """Make a standardized Riot API request with error handling."""
     headers = {"X-Riot-Token": RIOT_API_KEY}
-    response = requests.get(url, headers=headers)
+    started = time.perf_counter()
+    response = _import_requests().get(url, headers=headers)
+    record_riot_response(url, response, time.perf_counter() - started)
     
     if response.status_code == 404:
         raise ValueError("Summoner not found.")
@@ -108,6 +136,13 @@ def get_summoner_icon_url(profile_icon_id, version="15.14.1"):
     """Get summoner profile icon URL from Data Dragon API."""
     return f"https://ddragon.leagueoflegends.com/cdn/{version}/img/profileicon/{profile_icon_id}.png"
 
+def set_profile_author(embed, summoner_profile):
+    """Show the summoner level and icon as the embed author (no-op without a profile)."""
+    if summoner_profile:
+        profile_icon_url = get_summoner_icon_url(summoner_profile['profileIconId'])
+        embed.set_author(name=f"Nivel {summoner_profile['summonerLevel']}", icon_url=profile_icon_url)
+    return embed
+
 def get_match_result_info(participant):
     """Get match result and emoji."""
     resultado = "Victoria" if participant["win"] else "Derrota"
@@ -135,8 +170,8 @@ def get_farming_info(participant):
             "secondary_farm_type": "monstruos de jungla"
         }
 
-def get_role_expectations(participant):
-    """Get role-specific expectations for analysis."""
+def get_role_expectations(participant, baseline=None, game_duration=None):
+    """Get role-specific expectations for analysis; the farm target comes from the baseline median when known."""
     role = participant.get('teamPosition', '').upper()
     
     expectations = {
@@ -172,12 +207,29 @@ def get_role_expectations(participant):
         }
     }
     
-    return expectations.get(role, expectations['MIDDLE'])
+    role_expectations = expectations.get(role, expectations['MIDDLE'])
+    if baseline and game_duration:
+        role_expectations = dict(role_expectations, farm_target=round(baseline['medians']['cs_per_min'] * game_duration))
+    return role_expectations
+
+def get_participant_baseline(participant, match_data):
+    """Percentiles of a participant against players of the same role, queue and game length (None without data)."""
+    info = match_data["info"]
+    return baselines.describe(participant, info.get("queueId"), info.get("gameDuration"))
+
+def add_percentiles_field(embed, baseline):
+    """Add a 'CS/min p23 ...' field when the participant has a baseline."""
+    if baseline:
+        embed.add_field(
+            name=f"📈 Percentiles ({format_baseline_group(baseline['group'])})",
+            value=format_percentiles(baseline),
+            inline=False
+        )
 
-def create_stats_dict(participant, game_duration):
-    """Create standardized stats dictionary with role-specific farming info."""
+def create_stats_dict(participant, game_duration, baseline=None):
+    """Create standardized stats dictionary with role-specific farming info and percentiles."""
     farming_info = get_farming_info(participant)
-    role_expectations = get_role_expectations(participant)
+    role_expectations = get_role_expectations(participant, baseline, game_duration)
     
     # Calculate KDA
     kills = participant["kills"]
@@ -200,57 +252,83 @@ def create_stats_dict(participant, game_duration):
         "visionScore": participant.get("visionScore", 0),
         "goldEarned": participant.get("goldEarned", 0),
         "champLevel": participant.get("champLevel", 0),
-        "teamPosition": participant.get("teamPosition", "UNKNOWN")
+        "teamPosition": participant.get("teamPosition", "UNKNOWN"),
+        "baseline": baseline
     }
 
 # Player analysis functions
-def encontrar_peor_jugador(participants):
-    """Find the worst player in a list of participants."""
-    def calcular_score(p):
-        k, d, a = p["kills"], p["deaths"], p["assists"]
-        damage = p["totalDamageDealtToChampions"]
-        return (k + a) / max(1, d) + (damage / 10000)
+def encontrar_peor_jugador(participants, game_duration=None):
+    """Find the worst player in a list of participants (game_duration in minutes)."""
+    if not participants:
+        return "Unknown", None, 0
 
-    scores = {get_player_name(p): calcular_score(p) for p in participants}
-    
-    if not scores:
-        return "Unknown", participants[0], 0
-        
-    peor_nombre = min(scores, key=scores.get)
-    peor_partida = next(p for p in participants if get_player_name(p) == peor_nombre)
-    return peor_nombre, peor_partida, scores[peor_nombre]
+    batch = ParticipantBatch.from_participants(participants, game_duration * 60 if game_duration else None)
+    peor_idx = batch.worst_index()
+    peor_partida = participants[peor_idx]
+    return get_player_name(peor_partida), peor_partida, batch.metrics_for(peor_idx)['score']
 
 # Common match analysis functions
-async def get_match_analysis_data(riot_id: str):
-    """Get common match analysis data used by both commands"""
-    get_player_match_data = _import_get_player_match_data()
-    participant, match_data, game_duration, summoner_profile = await get_player_match_data(riot_id)
-    game_name = parse_riot_id(riot_id)[0]
-    
-    stats = create_stats_dict(participant, game_duration)
+async def get_match_analysis_data(riot_id: str, preloaded=None):
+    """Get common match analysis data used by both commands.
+
+    preloaded is an already fetched (participant, match_data, game_duration, summoner_profile).
+    """
+    if preloaded is None:
+        get_player_match_data = _import_get_player_match_data()
+        preloaded = await get_player_match_data(riot_id)
+    participant, match_data, game_duration, summoner_profile = preloaded
+    # The player's own spelling, not however the requester typed it
+    game_name = participant.get('riotIdGameName') or parse_riot_id(riot_id)[0]
+    
+    with span("analysis"):
+        stats = create_stats_dict(participant, game_duration, get_participant_baseline(participant, match_data))
     game_mode = match_data["info"]["gameMode"] or "Desconocido"
     
     return participant, match_data, game_duration, game_name, stats, game_mode, summoner_profile
 
-async def create_ultima_partida_embed(riot_id: str):
+async def create_ultima_partida_embed(riot_id: str, preloaded=None):
     """Create a complete ultima partida embed with AI analysis"""
     # Get match data
-    participant, match_data, game_duration, game_name, stats, game_mode, summoner_profile = await get_match_analysis_data(riot_id)
+    if preloaded is None:
+        get_player_match_data = _import_get_player_match_data()
+        preloaded = await get_player_match_data(riot_id)
+    participant, match_data, game_duration, summoner_profile = preloaded
+    
+    # Repeat views of the same match skip the analysis (stats, baselines and the OpenAI call);
+    # only the author is refreshed, since the level may have changed since it was cached
+    match_id = match_data["metadata"]["matchId"]
+    cached = get_cached_embed(match_id, participant["puuid"], "ultima_partida")
+    if cached is not None:
+        return set_profile_author(cached, summoner_profile)
     
     # Check if match is valid for analysis
     if not is_valid_match_for_analysis(match_data, participant):
         # Create embed without AI analysis for remake/very short games
-        return await create_simple_match_embed(riot_id, participant, match_data, game_duration, summoner_profile)
+        embed = await create_simple_match_embed(riot_id, participant, match_data, game_duration, summoner_profile)
+        return cache_embed(match_id, participant["puuid"], "ultima_partida", embed)
+    
+    participant, match_data, game_duration, game_name, stats, game_mode, summoner_profile = await get_match_analysis_data(riot_id, preloaded)
     
     # Generate AI analysis for valid matches
     generar_mensaje_openai = _import_generar_mensaje_openai()
     mensaje_openai = await generar_mensaje_openai(game_name, stats, participant, game_mode)
     
     # Create embed
-    return await create_match_analysis_embed(riot_id, participant, match_data, game_duration, mensaje_openai, summoner_profile)
+    embed = await create_match_analysis_embed(
+        riot_id, participant, match_data, game_duration, mensaje_openai, summoner_profile, stats["baseline"]
+    )
+    return cache_embed(match_id, participant["puuid"], "ultima_partida", embed)
 
+@spanned("embed")
 async def create_match_history_embed(riot_id: str, match_results, summoner_profile=None):
     """Create embed showing multiple matches with summary"""
+    # The history is identified by its ordered match ids
+    history_key = ",".join(match_id for _, _, _, match_id in match_results)
+    puuid = match_results[0][0]["puuid"] if match_results else None
+    cached = get_cached_embed(history_key, puuid, "historial")
+    if cached is not None:
+        return set_profile_author(cached, summoner_profile)
+    
     game_name = parse_riot_id(riot_id)[0]
     
     # Calculate overall stats
@@ -289,8 +367,10 @@ async def create_match_history_embed(riot_id: str, match_results, summoner_profi
     avg_kda = (total_kills + total_assists) / max(1, total_deaths)
     
     # Create embed
+    # Cached per player: the title uses their Riot ID as stored by Riot, not the requester's spelling
+    display_id = (get_player_riot_id(match_results[0][0]) if match_results else None) or riot_id
     embed = discord.Embed(
-        title=f"Historial de {riot_id} (Últimas {len(match_results)} partidas)",
+        title=f"Historial de {display_id} (Últimas {len(match_results)} partidas)",
         description=f"🏆 **{win_rate:.0f}% WR** | 📊 **{avg_kda:.1f} KDA promedio**",
         color=0x00ff00 if win_rate >= 50 else 0xff9900 if win_rate >= 30 else 0xff0000
     )
@@ -302,17 +382,16 @@ async def create_match_history_embed(riot_id: str, match_results, summoner_profi
     )
     
     # Set summoner profile icon if available
-    if summoner_profile:
-        profile_icon_url = get_summoner_icon_url(summoner_profile['profileIconId'])
-        embed.set_author(name=f"Nivel {summoner_profile['summonerLevel']}", icon_url=profile_icon_url)
+    set_profile_author(embed, summoner_profile)
     
     embed.set_footer(text="CapitanCoditos, Tu afk favorito. • Haz clic en una partida para ver el análisis detallado.")
     
-    return embed
+    return cache_embed(history_key, puuid, "historial", embed)
 
 # Discord utility functions
-async def create_match_analysis_embed(riot_id: str, participant, match_data, game_duration, analysis_message: str, summoner_profile=None):
-    """Create a standardized Discord embed for match analysis"""
+@spanned("embed")
+async def create_match_analysis_embed(riot_id: str, participant, match_data, game_duration, analysis_message: str, summoner_profile=None, baseline=None):
+    """Create a standardized Discord embed for match analysis (baseline from get_participant_baseline)"""
     game_name = parse_riot_id(riot_id)[0]
     
     champ = participant["championName"]
@@ -336,7 +415,7 @@ async def create_match_analysis_embed(riot_id: str, participant, match_data, gam
 
     # Create Discord embed
     embed = discord.Embed(
-        title=f"Última partida de {riot_id}",
+        title=f"Última partida de {get_player_riot_id(participant) or riot_id}",
         description=f"🎯 KDA: {kda} | 🕹️ {resultado} | 🕒 {game_duration} minutos",
         color=0x00ff00 if resultado == "Victoria" else 0xff0000
     )
@@ -354,18 +433,18 @@ async def create_match_analysis_embed(riot_id: str, participant, match_data, gam
         value=analysis_message,
         inline=False
     )
+    add_percentiles_field(embed, baseline)
     
     embed.set_thumbnail(url=champion_icon_url)
     
     # Set summoner profile icon if available
-    if summoner_profile:
-        profile_icon_url = get_summoner_icon_url(summoner_profile['profileIconId'])
-        embed.set_author(name=f"Nivel {summoner_profile['summonerLevel']}", icon_url=profile_icon_url)
+    set_profile_author(embed, summoner_profile)
     
     embed.set_footer(text="CapitanCoditos, Tu afk favorito.")
     
     return embed
 
+@spanned("embed")
 async def create_simple_match_embed(riot_id: str, participant, match_data, game_duration, summoner_profile=None):
     """Create a simple Discord embed for remake/very short matches without AI analysis"""
     game_name = parse_riot_id(riot_id)[0]
@@ -389,7 +468,7 @@ async def create_simple_match_embed(riot_id: str, participant, match_data, game_
 
     # Create Discord embed
     embed = discord.Embed(
-        title=f"Última partida de {riot_id}",
+        title=f"Última partida de {get_player_riot_id(participant) or riot_id}",
         description=f"🎯 KDA: {kda} | 🕹️ {resultado} | 🕒 {game_duration} minutos",
         color=0x00ff00 if resultado == "Victoria" else 0xff0000
     )
@@ -416,9 +495,7 @@ async def create_simple_match_embed(riot_id: str, participant, match_data, game_
     embed.set_thumbnail(url=champion_icon_url)
     
     # Set summoner profile icon if available
-    if summoner_profile:
-        profile_icon_url = get_summoner_icon_url(summoner_profile['profileIconId'])
-        embed.set_author(name=f"Nivel {summoner_profile['summonerLevel']}", icon_url=profile_icon_url)
+    set_profile_author(embed, summoner_profile)
     
     embed.set_footer(text="CapitanCoditos, Tu afk favorito.")
     
@@ -430,12 +507,21 @@ async def send_long_message(interaction, content):
     for i in range(0, len(content), max_length):
         await interaction.followup.send(content[i:i + max_length])
 
+async def require_owner(interaction) -> bool:
+    """True for the bot owner; anyone else gets an ephemeral refusal."""
+    if await interaction.client.is_owner(interaction.user):
+        return True
+    await interaction.response.send_message("❌ Solo el dueño del bot puede usar este comando.", ephemeral=True)
+    return False
+
 async def handle_command_error(interaction, error):
     """Centralized error handling for commands."""
-    if isinstance(error, ValueError):
-        await interaction.followup.send(f"⚠️ {str(error)}")
-    else:
-        await interaction.followup.send(f"❌ Ocurrió un error: {str(error)}")
+    mark_error()
+    with span("discord"):
+        if isinstance(error, ValueError):
+            await interaction.followup.send(f"⚠️ {str(error)}")
+        else:
+            await interaction.followup.send(f"❌ Ocurrió un error: {str(error)}")
 
 def is_valid_match_for_analysis(match_data, participant):
     """Check if a match is valid for AI analysis (not a remake or very short game)."""
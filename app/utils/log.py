@@ -0,0 +1,185 @@
+# Leveled, structured logging; records are written by a background thread, never on the event loop
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+ROOT = "capitan"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# discord.py is very chatty below INFO
+DISCORD_LOG_LEVEL = os.getenv("DISCORD_LOG_LEVEL", "INFO").upper()
+# text: "2026-01-01 12:00:00 INFO    riot.warmup Done seconds=3.2" / json: one object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Sampled events (autocomplete keystrokes, notifier checks...) keep at most this many records per second each
+LOG_SAMPLE_PER_SECOND = float(os.getenv("LOG_SAMPLE_PER_SECOND", "1"))
+# Records waiting for the writer thread; past this they are dropped instead of blocking the caller
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# user:password@ in any URL that ends up in a message or field
+_CREDENTIALS = re.compile(r"(\w+://[^:/@\s]+:)[^@\s]+@")
+
+_listener = None
+_setup_lock = threading.Lock()
+dropped_records = 0
+
+class _Sampler:
+    """At most `rate` records per second for each (logger, event); the rest are counted and reported later."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """(keep, suppressed since the last kept record)"""
+        now = time.monotonic()
+        with self._lock:
+            start, kept, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= 1.0:
+                start, kept = now, 0
+            if kept < self.rate:
+                self._windows[key] = (start, kept + 1, 0)
+                return True, suppressed
+            self._windows[key] = (start, kept, suppressed + 1)
+            return False, 0
+
+_sampler = _Sampler(LOG_SAMPLE_PER_SECOND)
+
+class Logger:
+    """logging.Logger taking structured fields as keyword arguments.
+
+        log.info("Match saved", match_id=match_id, participants=10)
+        log.debug("Autocomplete", sample=True, query=current)
+
+    Disabled levels return after a single cached level check, so hot paths pay almost
+    nothing at the production level. Pass values as fields instead of formatting them
+    into the event; the writer thread does the formatting.
+    """
+    __slots__ = ('_logger',)
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f"{ROOT}.{name}")
+
+    def isEnabledFor(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level, event, fields, sample=False, exc_info=None):
+        if sample:
+            keep, suppressed = _sampler.allow((self._logger.name, event))
+            if not keep:
+                return
+            if suppressed:
+                fields['suppressed'] = suppressed
+        self._logger.log(level, event, exc_info=exc_info, extra={'fields': fields}, stacklevel=3)
+
+    def debug(self, event, *, sample=False, **fields):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, event, fields, sample)
+
+    def info(self, event, *, sample=False, **fields):
+        if self._logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, event, fields, sample)
+
+    def warning(self, event, *, sample=False, **fields):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, event, fields, sample)
+
+    def error(self, event, *, sample=False, exc_info=None, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields, sample, exc_info)
+
+    def exception(self, event, **fields):
+        """Error with the traceback of the exception being handled."""
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, event, fields, exc_info=True)
+
+def get_logger(name: str) -> Logger:
+    """Logger for a module; pass __name__ (or a short name for entry points)."""
+    return Logger(name)
+
+def _text_value(value):
+    text = str(value)
+    return f'"{text}"' if not text or ' ' in text or '=' in text else text
+
+class StructuredFormatter(logging.Formatter):
+    """Renders the event plus its fields as key=value pairs or JSON; credentials in URLs are masked."""
+
+    def __init__(self, json_output=False):
+        super().__init__(datefmt="%Y-%m-%d %H:%M:%S")
+        self.json_output = json_output
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        name = record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + ".") else record.name
+        if self.json_output:
+            payload = {
+                'ts': self.formatTime(record, self.datefmt),
+                'level': record.levelname,
+                'logger': name,
+                'event': record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                payload['exc'] = self.formatException(record.exc_info)
+            line = json.dumps(payload, default=str, ensure_ascii=False)
+        else:
+            line = f"{self.formatTime(record, self.datefmt)} {record.levelname:<7} {name} {record.getMessage()}"
+            # Multi-line values (stack traces) go below the line instead of being quoted inline
+            blocks = {key: value for key, value in fields.items() if isinstance(value, str) and "\n" in value}
+            inline = [f"{key}={_text_value(value)}" for key, value in fields.items() if key not in blocks]
+            if inline:
+                line += " " + " ".join(inline)
+            for key, value in blocks.items():
+                line += f"\n{key}:\n{value.rstrip()}"
+            if record.exc_info:
+                line += "\n" + self.formatException(record.exc_info)
+        return _CREDENTIALS.sub(r"\1***@", line)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread untouched; formatting happens there, not in the caller."""
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        global dropped_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records += 1
+
+def setup_logging():
+    """Route every logger (ours and discord.py's) through a queue to a stdout writer thread.
+
+    Safe to call more than once; the writer is stopped, and the queue drained, at exit.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(StructuredFormatter(json_output=LOG_FORMAT == "json"))
+        _listener = logging.handlers.QueueListener(queue.Queue(LOG_QUEUE_SIZE), stream)
+
+        root = logging.getLogger()
+        root.handlers[:] = [_QueueHandler(_listener.queue)]
+        root.setLevel(logging.WARNING)
+        logging.getLogger(ROOT).setLevel(LOG_LEVEL)
+        logging.getLogger("discord").setLevel(DISCORD_LOG_LEVEL)
+
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
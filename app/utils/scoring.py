@@ -0,0 +1,102 @@
+# Vectorized scoring of participants across one or many matches
+import numpy as np
+
+# Weights of the composite score; KDA dominates, the rest separate players with similar KDA
+COMPOSITE_WEIGHTS = {
+    'kda': 1.0,
+    'damage_share': 5.0,
+    'cs_per_min': 0.3,
+    'vision_per_min': 1.0,
+}
+
+_FIELDS = (
+    ('kills', 'kills'),
+    ('deaths', 'deaths'),
+    ('assists', 'assists'),
+    ('damage', 'totalDamageDealtToChampions'),
+    ('minions', 'totalMinionsKilled'),
+    ('monsters', 'neutralMinionsKilled'),
+    ('vision', 'visionScore'),
+    ('gold', 'goldEarned'),
+)
+
+class ParticipantBatch:
+    """Participant stats from any number of matches, stored as column arrays.
+
+    Every metric is computed for all rows in one vectorized pass. ``group`` identifies
+    the (match, team) of each row so per-team metrics such as damage share work across
+    matches.
+    """
+
+    def __init__(self, participants, match_index, durations_s):
+        self.participants = participants
+        self.size = len(participants)
+        for attr, key in _FIELDS:
+            setattr(self, attr, np.fromiter((p.get(key, 0) or 0 for p in participants), dtype=np.float64, count=self.size))
+        self.match_index = np.asarray(match_index, dtype=np.int64)
+        self.team_id = np.fromiter((p.get('teamId', 0) or 0 for p in participants), dtype=np.int64, count=self.size)
+        self.minutes = np.maximum(np.asarray(durations_s, dtype=np.float64) / 60.0, 1.0)
+        _, self.group = np.unique(np.stack([self.match_index, self.team_id]), axis=1, return_inverse=True)
+        self.group = self.group.reshape(-1)
+        self._metrics = None
+
+    @classmethod
+    def from_participants(cls, participants, game_duration_s=None):
+        """Batch for the participants of a single match."""
+        durations = [game_duration_s or p.get('timePlayed', 0) for p in participants]
+        return cls(participants, [0] * len(participants), durations)
+
+    @classmethod
+    def from_matches(cls, matches):
+        """Batch with every participant of every match payload."""
+        participants, match_index, durations = [], [], []
+        for i, match_data in enumerate(matches):
+            info = match_data['info']
+            for p in info['participants']:
+                participants.append(p)
+                match_index.append(i)
+                durations.append(info.get('gameDuration', 0))
+        return cls(participants, match_index, durations)
+
+    def metrics(self) -> dict:
+        """KDA, damage share, CS/min, vision/min, legacy score and composite score for every row."""
+        if self._metrics is not None:
+            return self._metrics
+        kda = (self.kills + self.assists) / np.maximum(self.deaths, 1)
+        team_damage = np.bincount(self.group, weights=self.damage)[self.group] if self.size else self.damage
+        damage_share = np.divide(self.damage, team_damage, out=np.zeros_like(self.damage), where=team_damage > 0)
+        cs_per_min = (self.minions + self.monsters) / self.minutes
+        vision_per_min = self.vision / self.minutes
+        composite = (
+            COMPOSITE_WEIGHTS['kda'] * kda
+            + COMPOSITE_WEIGHTS['damage_share'] * damage_share
+            + COMPOSITE_WEIGHTS['cs_per_min'] * cs_per_min
+            + COMPOSITE_WEIGHTS['vision_per_min'] * vision_per_min
+        )
+        self._metrics = {
+            'kda': kda,
+            'damage_share': damage_share,
+            'cs_per_min': cs_per_min,
+            'vision_per_min': vision_per_min,
+            'gold_per_min': self.gold / self.minutes,
+            # Original "worst player" formula, kept so the roast target does not change
+            'score': kda + self.damage / 10000,
+            'composite': composite,
+        }
+        return self._metrics
+
+    def metrics_for(self, index: int) -> dict:
+        """Metrics of a single row as plain floats."""
+        return {name: float(values[index]) for name, values in self.metrics().items()}
+
+    def worst_index(self, metric: str = 'score') -> int:
+        """Row with the lowest value of ``metric``."""
+        return int(np.argmin(self.metrics()[metric]))
+
+    def worst_per_team(self, metric: str = 'score') -> np.ndarray:
+        """Index of the lowest ``metric`` row in each (match, team) group."""
+        values = self.metrics()[metric]
+        order = np.lexsort((values, self.group))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = self.group[order][1:] != self.group[order][:-1]
+        return order[first]
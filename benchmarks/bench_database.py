@@ -0,0 +1,101 @@
+# Autocomplete queries and summoner writes on throwaway SQLite databases
+import atexit
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from harness import benchmark
+from database import db, summoners
+from database import (
+    init_database, save_summoner, get_summoners_for_autocomplete, flush_pending_searches,
+    load_summoner_index, summoner_index
+)
+
+_TMP_DIR = tempfile.mkdtemp(prefix="capitan-bench-")
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+
+_SYLLABLES = ("ka", "ro", "ga", "mi", "zu", "le", "to", "xi", "na", "bo", "sha", "dre", "lu", "vex", "qi", "em")
+_TAGS = ("LAN", "LAS", "NA1", "BR1", "EUW", "0001", "MX", "ARG")
+
+def _riot_ids(count, seed=42):
+    rng = random.Random(seed)
+    ids = set()
+    while len(ids) < count:
+        name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        ids.add(f"{name.capitalize()}{rng.randint(0, 999)}#{rng.choice(_TAGS)}")
+    return sorted(ids)
+
+_built = set()
+
+def use_database(name, rows=0, reuse=False):
+    """Point the bot's database layer at a fresh SQLite file holding `rows` summoners"""
+    db.close_pool()
+    summoner_index.load([])
+    db.DB_PATH = os.path.join(_TMP_DIR, f"{name}.db")
+    if reuse and name in _built:
+        init_database()
+        return
+    _built.add(name)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db.DB_PATH + suffix):
+            os.remove(db.DB_PATH + suffix)
+    init_database()
+    if rows:
+        rng = random.Random(rows)
+        now = datetime(2026, 1, 1)
+        data = [
+            (riot_id, riot_id.split('#')[0], riot_id.split('#')[1], rng.randint(1, 50),
+             (now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))).strftime('%Y-%m-%d %H:%M:%S'))
+            for riot_id in _riot_ids(rows)
+        ]
+        with db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO summoners (riot_id, game_name, tag_line, search_count, last_searched) VALUES (?, ?, ?, ?, ?)',
+                data
+            )
+
+def _autocomplete_db(rows):
+    def setup():
+        use_database(f"autocomplete_{rows}", rows, reuse=True)
+        return ()
+    return setup
+
+def _register_autocomplete(rows, label):
+    setup = _autocomplete_db(rows)
+    for query, kind in (("", "top"), ("ka", "LIKE"), ("kar", "walk"), ("zzz", "FTS fallback")):
+        # The first benchmark of a size builds its database; the others reopen it
+        benchmark(f"autocomplete.db {label} '{query}' ({kind})", setup=setup)(
+            lambda query=query: get_summoners_for_autocomplete(query, 25)
+        )
+
+_register_autocomplete(1_000, "1k")
+_register_autocomplete(100_000, "100k")
+
+def _load_index():
+    _autocomplete_db(100_000)()
+    load_summoner_index()
+    return ()
+
+@benchmark("autocomplete.summoner_index.search 100k 'kar'", setup=_load_index)
+def bench_index_search():
+    summoner_index.search("kar", limit=25)
+
+_SEARCHED = _riot_ids(1_000, seed=7)
+
+def _empty_database():
+    use_database("writes")
+    return ()
+
+@benchmark("summoners.save_summoner (buffer)", setup=_empty_database)
+def bench_save_summoner():
+    for riot_id in _SEARCHED[:100]:
+        save_summoner(riot_id)
+    # Keep the buffer from growing across loops; only the in-memory path is measured here
+    summoners._pending_searches.clear()
+
+@benchmark("summoners.save_summoner + flush (1000 invocadores)", setup=_empty_database, threshold=0.5)
+def bench_save_and_flush():
+    for riot_id in _SEARCHED:
+        save_summoner(riot_id)
+    flush_pending_searches()
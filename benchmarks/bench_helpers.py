@@ -0,0 +1,81 @@
+# Match analysis helpers and embed builders on the recorded match
+import copy
+import random
+from harness import benchmark, load_match
+from utils.baselines import BaselineEngine, ROLES
+from utils.helpers import (
+    create_stats_dict, encontrar_peor_jugador, is_valid_match_for_analysis,
+    create_match_analysis_embed, create_simple_match_embed, create_match_history_embed
+)
+from utils.embed_cache import embed_cache
+
+MATCH = load_match()
+PARTICIPANTS = MATCH['info']['participants']
+PARTICIPANT = PARTICIPANTS[0]
+GAME_DURATION = MATCH['info']['gameDuration'] // 60
+RIOT_ID = f"{PARTICIPANT.get('riotIdGameName') or 'Jugador'}#{PARTICIPANT.get('riotIdTagline') or 'LAN'}"
+PROFILE = {'profileIconId': 588, 'summonerLevel': 312}
+ANALYSIS = "Con ese KDA, deberías estar jugando en la liga de los bots."
+
+def _baseline_engine(rows=20_000, seed=42):
+    """Local engine over synthetic participants of the recorded match's queue (BASELINE_COLUMNS order)"""
+    rng = random.Random(seed)
+    queue_id = MATCH['info']['queueId']
+    engine = BaselineEngine()
+    engine.load([
+        (rng.choice(ROLES[:-1]), queue_id, rng.randint(900, 2700), rng.randint(0, 15), rng.randint(0, 12),
+         rng.randint(0, 25), rng.randint(3000, 45000), rng.randint(10, 320), rng.randint(0, 200),
+         rng.randint(5, 90), rng.randint(5000, 20000), rng.randint(8, 18))
+        for _ in range(rows)
+    ])
+    return engine
+
+def _describe(engine):
+    return engine.describe(PARTICIPANT, MATCH['info']['queueId'], MATCH['info']['gameDuration'])
+
+def _baseline():
+    """describe() of the recorded participant against a populated engine, so the percentile paths run"""
+    baseline = _describe(_baseline_engine())
+    assert baseline is not None
+    return (baseline,)
+
+def _history(count=5):
+    """count copies of the recorded match under distinct match ids, as get_player_multiple_matches returns them"""
+    results = []
+    for i in range(count):
+        match = copy.deepcopy(MATCH)
+        match['metadata']['matchId'] = f"LA1_{1636611760 - i}"
+        results.append((match['info']['participants'][0], match, GAME_DURATION, match['metadata']['matchId']))
+    return results
+
+@benchmark("helpers.create_stats_dict", setup=_baseline)
+def bench_create_stats_dict(baseline):
+    create_stats_dict(PARTICIPANT, GAME_DURATION, baseline)
+
+@benchmark("baselines.describe (20k participantes)", setup=lambda: (_baseline_engine(),), threshold=0.5)
+def bench_describe(engine):
+    _describe(engine)
+
+@benchmark("helpers.encontrar_peor_jugador (10 jugadores)")
+def bench_encontrar_peor_jugador():
+    encontrar_peor_jugador(PARTICIPANTS, GAME_DURATION)
+
+@benchmark("helpers.is_valid_match_for_analysis")
+def bench_is_valid_match_for_analysis():
+    is_valid_match_for_analysis(MATCH, PARTICIPANT)
+
+# The builders memoize rendered embeds; the cache is cleared so every call builds one
+@benchmark("embed.create_match_analysis_embed", setup=_baseline)
+async def bench_create_match_analysis_embed(baseline):
+    embed_cache.clear()
+    await create_match_analysis_embed(RIOT_ID, PARTICIPANT, MATCH, GAME_DURATION, ANALYSIS, PROFILE, baseline)
+
+@benchmark("embed.create_simple_match_embed")
+async def bench_create_simple_match_embed():
+    embed_cache.clear()
+    await create_simple_match_embed(RIOT_ID, PARTICIPANT, MATCH, GAME_DURATION, PROFILE)
+
+@benchmark("embed.create_match_history_embed (5 partidas)", setup=lambda: (_history(),))
+async def bench_create_match_history_embed(history):
+    embed_cache.clear()
+    await create_match_history_embed(RIOT_ID, history, PROFILE)
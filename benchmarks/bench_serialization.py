@@ -0,0 +1,31 @@
+# Decoding and encoding of Riot match payloads, as stored and re-read by the match archive
+import json
+from harness import benchmark, load_match
+from bench_database import use_database
+from database import save_match, get_stored_match
+from database.matches import participant_rows
+
+MATCH = load_match()
+PAYLOAD = json.dumps(MATCH)
+MATCH_ID = MATCH['metadata']['matchId']
+
+@benchmark("json.loads match payload")
+def bench_json_loads():
+    json.loads(PAYLOAD)
+
+@benchmark("json.dumps match payload")
+def bench_json_dumps():
+    json.dumps(MATCH)
+
+@benchmark("matches.participant_rows")
+def bench_participant_rows():
+    participant_rows(MATCH)
+
+def _stored_match():
+    use_database("matches")
+    save_match(MATCH)
+    return (MATCH_ID,)
+
+@benchmark("matches.get_stored_match (SQLite)", setup=_stored_match)
+def bench_get_stored_match(match_id):
+    get_stored_match(match_id)
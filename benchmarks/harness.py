@@ -0,0 +1,128 @@
+# Minimal benchmark harness: calibrated loops, repeated runs and comparison against stored baselines
+import asyncio
+import functools
+import gc
+import inspect
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'app')
+MATCH_JSON = os.path.join(APP_DIR, 'riot', 'matches.json')
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# A benchmark regresses when its median is this much slower than the baseline (0.25 = 25%)
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = []
+
+class Benchmark:
+    def __init__(self, name, func, setup=None, teardown=None, threshold=DEFAULT_THRESHOLD):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.teardown = teardown
+        self.threshold = threshold
+        self.is_async = inspect.iscoroutinefunction(func)
+
+def benchmark(name, setup=None, teardown=None, threshold=DEFAULT_THRESHOLD):
+    """Register func as a benchmark; setup() returns the arguments func is called with."""
+    def decorator(func):
+        BENCHMARKS.append(Benchmark(name, func, setup, teardown, threshold))
+        return func
+    return decorator
+
+def prepare_environment():
+    """Import the bot's modules from app/ against a throwaway SQLite database, with no network."""
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    os.environ['DB_TYPE'] = 'sqlite'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('RIOT_API_KEY', 'benchmark')
+
+def load_match() -> dict:
+    with open(MATCH_JSON, encoding='utf-8') as f:
+        return json.load(f)
+
+def _run_loops(bench, args, loops, loop):
+    if bench.is_async:
+        async def run():
+            started = time.perf_counter()
+            for _ in range(loops):
+                await bench.func(*args)
+            return time.perf_counter() - started
+        return loop.run_until_complete(run())
+    call = functools.partial(bench.func, *args)
+    started = time.perf_counter()
+    for _ in range(loops):
+        call()
+    return time.perf_counter() - started
+
+def measure(bench, min_time: float = 0.2, repeats: int = 5) -> dict:
+    """Per-call seconds of a benchmark: loops are calibrated so one repeat lasts about min_time."""
+    args = bench.setup() if bench.setup else ()
+    loop = asyncio.new_event_loop() if bench.is_async else None
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            elapsed = _run_loops(bench, args, loops, loop)
+            if elapsed >= min_time / 10 or loops >= 10 ** 6:
+                break
+            loops *= 10
+        loops = max(1, int(loops * (min_time / max(elapsed, 1e-9))))
+        timings = [_run_loops(bench, args, loops, loop) / loops for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        if loop is not None:
+            loop.close()
+        if bench.teardown:
+            bench.teardown(*args)
+    return {'median_s': statistics.median(timings), 'min_s': min(timings), 'loops': loops, 'repeats': repeats}
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+    if not os.path.exists(path):
+        return {'results': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baselines(results: dict, previous: dict, path: str = BASELINES_PATH):
+    """Store medians as the new baselines, keeping any threshold edited by hand."""
+    stored = dict(previous.get('results', {}))
+    for bench, result in results.items():
+        threshold = stored.get(bench.name, {}).get('threshold', bench.threshold)
+        stored[bench.name] = {'median_s': result['median_s'], 'threshold': threshold}
+    data = {
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} {platform.processor() or ''}".strip(),
+        'updated': time.strftime('%Y-%m-%d'),
+        'results': dict(sorted(stored.items())),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+def compare(bench, result, baselines) -> tuple:
+    """(status, change) against the stored baseline: 'new', 'ok', 'faster' or 'REGRESSION'"""
+    baseline = baselines.get('results', {}).get(bench.name)
+    if not baseline:
+        return 'new', None
+    change = result['median_s'] / baseline['median_s'] - 1
+    threshold = baseline.get('threshold', bench.threshold)
+    if change > threshold:
+        return 'REGRESSION', change
+    if change < -threshold:
+        return 'faster', change
+    return 'ok', change
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
@@ -0,0 +1,61 @@
+# Run the microbenchmarks and compare them against benchmarks/baselines.json
+#
+#   python benchmarks/run.py                # run everything, exit 1 on a regression
+#   python benchmarks/run.py -k autocomplete
+#   python benchmarks/run.py --update       # store the medians as the new baselines
+import argparse
+import sys
+import harness
+
+harness.prepare_environment()
+
+from utils.log import setup_logging
+setup_logging()
+
+import bench_helpers  # noqa: E402,F401 - benchmarks register themselves on import
+import bench_database  # noqa: E402,F401
+import bench_serialization  # noqa: E402,F401
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks del bot")
+    parser.add_argument("-k", dest="filter", default="", help="Solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--quick", action="store_true", help="Menos repeticiones (resultados más ruidosos)")
+    parser.add_argument("--update", action="store_true", help="Guardar las medianas como nuevas líneas base")
+    parser.add_argument("--baselines", default=harness.BASELINES_PATH, help="Archivo de líneas base")
+    args = parser.parse_args()
+
+    selected = [bench for bench in harness.BENCHMARKS if args.filter in bench.name]
+    if not selected:
+        print(f"Ningún benchmark coincide con '{args.filter}'")
+        return 2
+
+    baselines = harness.load_baselines(args.baselines)
+    min_time, repeats = (0.05, 3) if args.quick else (0.2, 5)
+    width = max(len(bench.name) for bench in selected)
+    print(f"{'benchmark':<{width}}  {'mediana':>10}  {'mínimo':>10}  {'cambio':>8}  estado")
+
+    results, regressions = {}, []
+    for bench in selected:
+        result = harness.measure(bench, min_time=min_time, repeats=repeats)
+        results[bench] = result
+        status, change = harness.compare(bench, result, baselines)
+        if status == 'REGRESSION':
+            regressions.append(bench.name)
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(
+            f"{bench.name:<{width}}  {harness.format_seconds(result['median_s']):>10}  "
+            f"{harness.format_seconds(result['min_s']):>10}  {change_text:>8}  {status}",
+            flush=True
+        )
+
+    if args.update:
+        harness.save_baselines(results, baselines, args.baselines)
+        print(f"Líneas base guardadas en {args.baselines}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} regresión(es): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
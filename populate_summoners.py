@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append('.')
 
-from app.database import save_summoner, get_summoners_for_autocomplete, get_summoner_stats
+from app.database import init_database, save_summoner, get_summoners_for_autocomplete, get_summoner_stats, flush_pending_searches
 
 def populate_summoners():
     """Popula la base de datos con summoners específicos"""
@@ -23,6 +23,9 @@ def populate_summoners():
         "VenEkko#PETE"
     ]
     
+    # La base ya no se inicializa al importar el módulo
+    init_database()
+    
     print("🎮 Populando base de datos con summoners...")
     print("=" * 50)
     
@@ -52,6 +55,9 @@ def populate_summoners():
     
     print("\n" + "=" * 50)
     
+    # Las búsquedas se guardan en lote; escribirlas antes de leer estadísticas
+    flush_pending_searches()
+    
     # Mostrar estadísticas finales
     stats = get_summoner_stats()
     print(f"📊 Total summoners: {stats['total_summoners']}")